@@ -19,9 +19,13 @@ def _check_bloomberg_terminal():
     Supports:
     - SKIP_BLOOMBERG=1 env var to skip pull without prompt (for batch/CI use)
     - BLOOMBERG_TERMINAL_OPEN=1 env var to enable pull without prompt
+    - BBG_SOURCE=replay env var to pull from the offline replay source
     - Interactive prompt: Enter=skip, y=pull, n/quit=exit
     """
     # Check environment variables first (for non-interactive use)
+    if os.environ.get("BBG_SOURCE", "").lower() == "replay":
+        print("BBG_SOURCE=replay detected, pulling from offline replay source...")
+        return True  # Pull enabled, no terminal needed
     if os.environ.get("SKIP_BLOOMBERG", "").lower() in ("true", "1", "yes"):
         print("SKIP_BLOOMBERG detected, skipping Bloomberg pull...")
         return False  # Skip pull, no prompt
@@ -95,7 +99,7 @@ def task_pull():
         }
     return {
         "actions": ["python src/pull_bbg_treasury_sf.py"],
-        "file_dep": ["src/pull_bbg_treasury_sf.py"],
+        "file_dep": ["src/pull_bbg_treasury_sf.py", "src/ticker_registry.py"],
         "targets": [
             DATA_DIR / "treasury_yields.parquet",
             DATA_DIR / "sf_rates.parquet",
@@ -106,29 +110,32 @@ def task_pull():
 
 
 def task_calc():
-    """Calculate Treasury-SF basis."""
+    """Calculate Treasury-SF basis and create FTSFR datasets in a single pass."""
     return {
-        "actions": ["python src/calc_treasury_sf_basis.py"],
+        "actions": ["python src/build_treasury_sf_basis.py"],
         "file_dep": [
+            "src/build_treasury_sf_basis.py",
             "src/calc_treasury_sf_basis.py",
+            "src/create_ftsfr_datasets.py",
+            "src/basis_storage.py",
+            "src/ticker_registry.py",
             DATA_DIR / "treasury_yields.parquet",
             DATA_DIR / "sf_rates.parquet",
         ],
-        "targets": [DATA_DIR / "treasury_sf_basis.parquet"],
+        "targets": [
+            DATA_DIR / "treasury_sf_basis.parquet",
+            DATA_DIR / "treasury_sf_basis_curve.parquet",
+            DATA_DIR / "ftsfr_treasury_sf_basis.parquet",
+        ],
         "verbosity": 2,
         "task_dep": ["pull"],
     }
 
 
 def task_format():
-    """Create FTSFR standardized datasets."""
+    """Create FTSFR standardized datasets (written by calc in the same pass)."""
     return {
-        "actions": ["python src/create_ftsfr_datasets.py"],
-        "file_dep": [
-            "src/create_ftsfr_datasets.py",
-            DATA_DIR / "treasury_sf_basis.parquet",
-        ],
-        "targets": [DATA_DIR / "ftsfr_treasury_sf_basis.parquet"],
+        "actions": [],
         "verbosity": 2,
         "task_dep": ["calc"],
     }
@@ -0,0 +1,143 @@
+"""
+Content-addressed on-disk cache for raw Bloomberg responses.
+
+Each cached entry holds the history of one (ticker, field) pair for one
+request window and data source, stored as a small parquet file named by the
+SHA-256 hash of that key. Entries are evicted least-recently-used first once
+the cache exceeds its size bound. Entries whose window ends within the last
+few days are also given a time-to-live, since the most recent observations
+can still be revised.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Maximum total size of the cache directory before LRU eviction
+MAX_BYTES = 512 * 1024**2
+
+# Entries whose window ends within RECENT_DAYS of today expire after RECENT_TTL seconds
+RECENT_DAYS = 5
+RECENT_TTL = 6 * 60 * 60
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of per-(ticker, field) bdh responses.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        Directory holding the cache entries
+    max_bytes : int
+        Total size bound; least recently used entries are evicted beyond it
+    recent_days : int
+        Windows ending within this many days of today are treated as recent
+    recent_ttl : float
+        Time-to-live in seconds for recent entries
+    """
+
+    def __init__(
+        self,
+        cache_dir,
+        max_bytes=MAX_BYTES,
+        recent_days=RECENT_DAYS,
+        recent_ttl=RECENT_TTL,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.recent_days = recent_days
+        self.recent_ttl = recent_ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(ticker, field, start_date, end_date, source):
+        """Return the content address for a (ticker, field, start, end, source) request."""
+        payload = json.dumps(
+            [
+                ticker,
+                field,
+                pd.Timestamp(start_date).strftime("%Y-%m-%d"),
+                pd.Timestamp(end_date).strftime("%Y-%m-%d"),
+                source,
+            ]
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.parquet"
+
+    def _is_recent(self, end_date):
+        cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=self.recent_days)
+        return pd.Timestamp(end_date) >= cutoff
+
+    def get(self, ticker, field, start_date, end_date, source):
+        """
+        Look up a cached series.
+
+        Returns
+        -------
+        pd.Series or None
+            The cached series (possibly empty), or None on a miss or expired entry
+        """
+        path = self._path(self.key(ticker, field, start_date, end_date, source))
+        try:
+            table = pq.read_table(path)
+        except FileNotFoundError:
+            return None
+
+        written_at = float(table.schema.metadata[b"written_at"])
+        if self._is_recent(end_date) and time.time() - written_at > self.recent_ttl:
+            path.unlink(missing_ok=True)
+            return None
+
+        # Touch the entry so eviction is least-recently-used
+        os.utime(path)
+        df = table.to_pandas()
+        return df.set_index("date")["value"].rename_axis(None)
+
+    def put(self, ticker, field, start_date, end_date, source, series):
+        """Store a series and evict old entries if the cache is over its size bound."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(self.key(ticker, field, start_date, end_date, source))
+
+        table = pa.Table.from_pandas(
+            pd.DataFrame({"date": series.index, "value": series.to_numpy(dtype=float)}),
+            preserve_index=False,
+        )
+        table = table.replace_schema_metadata({"written_at": str(time.time())})
+
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob("*.parquet"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def clear(self):
+        """Remove every cache entry."""
+        for path in self.cache_dir.glob("*.parquet"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,116 @@
+"""
+Build all Treasury-SF basis outputs in a single pass.
+
+Fuses the calc and format stages: the raw Treasury and SF data are read and
+joined once, the basis is computed once, and every output is written from
+that one result:
+
+- treasury_sf_basis.parquet: wide basis with staleness columns
+- treasury_sf_basis_curve.parquet: dense basis curve across maturities
+- ftsfr_treasury_sf_basis.parquet: FTSFR long format (unique_id, ds, y)
+
+The outputs are identical to running calc_treasury_sf_basis.py and then
+create_ftsfr_datasets.py, which is what the doit graph used to do.
+"""
+
+import argparse
+import sys
+
+sys.path.insert(0, "./src")
+
+import basis_storage
+import chartbook
+import calc_treasury_sf_basis
+import create_ftsfr_datasets
+
+BASE_DIR = chartbook.env.get_project_root()
+DATA_DIR = BASE_DIR / "_data"
+
+
+def build_treasury_sf_basis(
+    data_dir=DATA_DIR,
+    max_fill_gap=calc_treasury_sf_basis.MAX_FILL_GAP,
+    compact=None,
+    partitioned=False,
+    asof_tolerance=None,
+):
+    """
+    Compute the basis once and write the wide, curve and FTSFR outputs.
+
+    Parameters
+    ----------
+    data_dir : Path
+        Directory containing the raw data; outputs are written here too
+    max_fill_gap : int, optional
+        Maximum business days a value is forward-filled (None for no limit)
+    compact : str, optional
+        Store values as "float32" or "int32" (see basis_storage.py)
+    partitioned : bool
+        Write the FTSFR output series-partitioned instead of as one file
+    asof_tolerance : str or pd.Timedelta, optional
+        As-of join tolerance (see ``calc_treasury_sf_basis.prepare_data``)
+
+    Returns
+    -------
+    pd.DataFrame
+        The FTSFR long-format frame
+    """
+    print(">> Building Treasury-SF basis outputs...")
+
+    # One read and join of the raw data
+    df_merged = calc_treasury_sf_basis.load_prepared_data(data_dir, asof_tolerance=asof_tolerance)
+
+    basis_df = calc_treasury_sf_basis.compute_filled_basis(
+        df_merged, max_fill_gap, with_staleness=True
+    )
+    calc_treasury_sf_basis.save_treasury_sf_basis(
+        basis_df, data_dir / "treasury_sf_basis.parquet", compact
+    )
+    print(f"   Saved: treasury_sf_basis.parquet ({len(basis_df):,} dates)")
+
+    curve_df = calc_treasury_sf_basis.compute_treasury_sf_basis_curve(df_merged)
+    calc_treasury_sf_basis.save_treasury_sf_basis_curve(
+        curve_df, data_dir / "treasury_sf_basis_curve.parquet", compact
+    )
+    print("   Saved: treasury_sf_basis_curve.parquet")
+
+    # FTSFR long format from the same in-memory basis
+    basis_cols = [
+        col for col in basis_df.columns
+        if not col.endswith(calc_treasury_sf_basis.STALENESS_SUFFIX)
+    ]
+    df_long = create_ftsfr_datasets.wide_to_long(basis_df[basis_cols])
+    output_path = create_ftsfr_datasets.save_ftsfr(df_long, data_dir, compact, partitioned)
+    print(f"   Saved: {output_path.name} ({len(df_long):,} records)")
+
+    return df_long
+
+
+def main(max_fill_gap=calc_treasury_sf_basis.MAX_FILL_GAP, compact=None, partitioned=False):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    build_treasury_sf_basis(
+        DATA_DIR, max_fill_gap=max_fill_gap, compact=compact, partitioned=partitioned
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--max-fill-gap",
+        type=int,
+        default=calc_treasury_sf_basis.MAX_FILL_GAP,
+        help="Maximum business days a basis value is forward-filled (default: no limit)",
+    )
+    parser.add_argument(
+        "--compact",
+        choices=basis_storage.STORAGE_MODES,
+        default=None,
+        help="Store values as float32 or as int32 hundredths of a bp (default: float64)",
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="Write the FTSFR output as one file per series plus a manifest",
+    )
+    args = parser.parse_args()
+    main(max_fill_gap=args.max_fill_gap, compact=args.compact, partitioned=args.partitioned)
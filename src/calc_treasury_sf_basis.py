@@ -12,48 +12,167 @@ Data Sources:
     - Bloomberg SOFR OIS swap rates
 """
 
+import argparse
+import functools
+import os
 import sys
+import warnings
 from pathlib import Path
 
 sys.path.insert(0, "./src")
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
+import basis_storage
 import chartbook
 import pull_bbg_treasury_sf
+import ticker_registry
 
 BASE_DIR = chartbook.env.get_project_root()
 DATA_DIR = BASE_DIR / "_data"
 
-# Mapping from Bloomberg tickers to tenor names
-TREASURY_MAPPING = {
-    "USGG2YR": "2Y",
-    "USGG5YR": "5Y",
-    "USGG10YR": "10Y",
-    "USGG20YR": "20Y",
-    "USGG30YR": "30Y",
-}
-
-SF_MAPPING = {
-    "USOSFR2": "2Y",
-    "USOSFR5": "5Y",
-    "USOSFR10": "10Y",
-    "USOSFR20": "20Y",
-    "USOSFR30": "30Y",
-}
+# Mapping from Bloomberg tickers to tenor names (from ticker_registry.py)
+TREASURY_MAPPING = ticker_registry.treasury_mapping()
+SF_MAPPING = ticker_registry.sf_mapping()
 
 # Output column names
-OUTPUT_COLUMNS = {
-    "2Y": "Treasury_SF_2Y",
-    "5Y": "Treasury_SF_5Y",
-    "10Y": "Treasury_SF_10Y",
-    "20Y": "Treasury_SF_20Y",
-    "30Y": "Treasury_SF_30Y",
-}
+OUTPUT_COLUMNS = ticker_registry.output_columns()
 
+# Rates are quoted in percent; the basis is reported in basis points
+BPS_PER_PERCENT = 100.0
 
-def prepare_data(treasury_df, sf_df):
+# Maximum number of business days a basis value is carried forward
+# (None fills without limit)
+MAX_FILL_GAP = None
+
+# Suffix of the per-series staleness columns stored with the basis output
+STALENESS_SUFFIX = "_days_stale"
+
+# Rows per record batch read from each raw source in streaming mode
+STREAM_BATCH_SIZE = 65_536
+
+# Rows per parquet row group of treasury_sf_basis.parquet, so readers of a
+# recent date window (e.g. the incremental FTSFR update) decode only its tail
+BASIS_ROW_GROUP_SIZE = 256
+
+# Compute backend for the full calculation: "pandas" or "polars"
+BACKEND = "pandas"
+
+# Maturities (in years) of the dense basis curve interpolated across tenors:
+# every whole year within the range of the registered tenors
+CURVE_YEARS = ticker_registry.curve_years()
+
+# Storage of the basis values on disk: None (float64), "float32", or "int32"
+# (hundredths of a bp). See basis_storage.py for the precision bounds.
+COMPACT = None
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_columns(columns, kind):
+    """
+    Resolve raw Bloomberg column names to standardized tenor column names.
+
+    The result depends only on the input schema, so it is computed once per
+    distinct (columns, kind) and cached. Columns that do not map to a
+    registered ticker keep their name and are reported with a warning.
+
+    Parameters
+    ----------
+    columns : tuple of str
+        Raw column names, e.g. ('USGG2YR Index_PX_LAST', ...)
+    kind : str
+        "Treasury" or "SF"
+
+    Returns
+    -------
+    tuple of str
+        Resolved column names, e.g. ('2Y_Treasury', ...)
+    """
+    mapping = {"Treasury": TREASURY_MAPPING, "SF": SF_MAPPING}[kind]
+
+    resolved = []
+    unknown = []
+    for col in columns:
+        ticker = col.split()[0] if "_PX_LAST" in col else None
+        if ticker in mapping:
+            resolved.append(f"{mapping[ticker]}_{kind}")
+        else:
+            resolved.append(col)
+            unknown.append(col)
+
+    if unknown:
+        warnings.warn(f"Unrecognized {kind} columns left unmapped: {unknown}", stacklevel=2)
+    return tuple(resolved)
+
+
+def _index_keys(index):
+    """Return an index as a sortable NumPy array of datetimes/numbers, or None."""
+    if pd.api.types.is_datetime64_any_dtype(index) or pd.api.types.is_numeric_dtype(index):
+        return index.to_numpy()
+    try:
+        return pd.DatetimeIndex(index).to_numpy()
+    except (TypeError, ValueError):
+        return None
+
+
+def asof_join_on_index(left, right, tolerance=None):
+    """
+    As-of join two DataFrames on their index.
+
+    Each left row is matched to the most recent right row at or before its
+    timestamp (as ``pd.merge_asof`` with ``direction="backward"``), which
+    suits asynchronous intraday snaps where the two sides never share exact
+    timestamps. Matches are found with one vectorized ``np.searchsorted``
+    over the sorted right keys, so there is no cartesian merge or per-row
+    Python loop.
+
+    Parameters
+    ----------
+    left, right : pd.DataFrame
+        Frames to join, indexed by timestamp (or number)
+    tolerance : str or pd.Timedelta, optional
+        Maximum age of the matched right row, e.g. "5min". Rows without a
+        match within the tolerance get NaN right columns. None for no limit.
+
+    Returns
+    -------
+    pd.DataFrame
+        Every left row, with left columns followed by the as-of right
+        columns, on the left frame's (sorted) index
+    """
+    if not left.index.is_monotonic_increasing:
+        left = left.sort_index(kind="stable")
+    if not right.index.is_monotonic_increasing:
+        right = right.sort_index(kind="stable")
+
+    left_keys = _index_keys(left.index)
+    right_keys = _index_keys(right.index)
+    if left_keys is None or right_keys is None:
+        raise TypeError("as-of join requires datetime or numeric indexes")
+
+    # Last right row with key <= left key (ties resolve to the latest row)
+    pos = np.searchsorted(right_keys, left_keys, side="right") - 1
+    matched = pos >= 0
+    pos = np.maximum(pos, 0)
+    if tolerance is not None and len(right_keys):
+        if np.issubdtype(left_keys.dtype, np.datetime64):
+            tolerance = pd.Timedelta(tolerance).to_timedelta64()
+        matched &= left_keys - right_keys[pos] <= tolerance
+
+    if len(right_keys):
+        right_part = right.take(pos)
+    else:
+        right_part = right.reindex(range(len(left)))
+    right_part.index = left.index
+    right_part = right_part.where(pd.Series(matched, index=left.index), axis=0)
+    return pd.concat([left, right_part], axis=1)
+
+
+def prepare_data(treasury_df, sf_df, asof_tolerance=None):
     """
     Prepare Treasury and SF data for basis calculations.
 
@@ -63,48 +182,65 @@ def prepare_data(treasury_df, sf_df):
         Treasury yields from Bloomberg
     sf_df : pd.DataFrame
         SF rates from Bloomberg
+    asof_tolerance : str or pd.Timedelta, optional
+        If given, as-of join each Treasury timestamp to the latest SF quote
+        no older than this (e.g. "5min" for intraday snaps) instead of
+        requiring exact timestamp matches
 
     Returns
     -------
     pd.DataFrame
         Merged DataFrame with standardized column names
     """
-    # Set Date as index
-    treasury_df = (
-        treasury_df.set_index("index") if "index" in treasury_df.columns else treasury_df
-    )
-    sf_df = (
-        sf_df.set_index("index") if "index" in sf_df.columns else sf_df
-    )
-
-    # Clean up column names - extract ticker from Bloomberg format
-    def clean_columns(df, mapping, suffix):
-        new_cols = {}
-        for col in df.columns:
-            if "_PX_LAST" in col:
-                ticker = col.split()[0]
-                if ticker in mapping:
-                    new_cols[col] = f"{mapping[ticker]}_{suffix}"
-        df = df.rename(columns=new_cols)
+    # Set Date as index and standardize column names. Relabeling a new (or
+    # shallow-copied) frame avoids copying the data as rename() would.
+    def standardize(df, kind):
+        df = df.set_index("index") if "index" in df.columns else df.copy(deep=False)
+        df.columns = resolve_columns(tuple(df.columns), kind)
         return df
 
-    treasury_df = clean_columns(treasury_df, TREASURY_MAPPING, "Treasury")
-    sf_df = clean_columns(sf_df, SF_MAPPING, "SF")
+    treasury_df = standardize(treasury_df, "Treasury")
+    sf_df = standardize(sf_df, "SF")
 
     # Merge dataframes
-    df_merged = treasury_df.merge(
-        sf_df, left_index=True, right_index=True, how="inner"
-    )
+    if asof_tolerance is not None:
+        df_merged = asof_join_on_index(treasury_df, sf_df, asof_tolerance)
+    else:
+        df_merged = treasury_df.merge(sf_df, left_index=True, right_index=True, how="inner")
 
     return df_merged
 
 
+def basis_kernel(treasury, sf):
+    """
+    Compute the basis in basis points from aligned 2-D rate arrays.
+
+    Parameters
+    ----------
+    treasury : np.ndarray
+        (dates x tenors) Treasury yields in percent
+    sf : np.ndarray
+        (dates x tenors) SF rates in percent, same shape and column order
+
+    Returns
+    -------
+    np.ndarray
+        (dates x tenors) basis, (Treasury - SF) * 100
+    """
+    basis = np.subtract(treasury, sf)
+    basis *= BPS_PER_PERCENT
+    return basis
+
+
 def compute_treasury_sf_basis(df_merged):
     """
     Compute Treasury-SF basis in basis points.
 
     The basis is calculated as: (Treasury Yield - SF Rate) * 100
-    to convert from percentage to basis points.
+    to convert from percentage to basis points. The Treasury and SF columns
+    for every tenor present in both are gathered into two contiguous 2-D
+    float arrays and all tenors are computed in one vectorized operation.
+    The input is not modified.
 
     Parameters
     ----------
@@ -114,32 +250,347 @@ def compute_treasury_sf_basis(df_merged):
     Returns
     -------
     pd.DataFrame
-        DataFrame with basis spreads for each tenor
+        New DataFrame with basis spreads for each tenor, on the input's index
     """
-    tenors = ["2Y", "5Y", "10Y", "20Y", "30Y"]
+    tenors = [
+        tenor
+        for tenor in OUTPUT_COLUMNS
+        if f"{tenor}_Treasury" in df_merged.columns and f"{tenor}_SF" in df_merged.columns
+    ]
 
-    for tenor in tenors:
-        treas_col = f"{tenor}_Treasury"
-        sf_col = f"{tenor}_SF"
-        output_col = OUTPUT_COLUMNS[tenor]
+    treasury = df_merged[[f"{tenor}_Treasury" for tenor in tenors]].to_numpy(dtype="float64")
+    sf = df_merged[[f"{tenor}_SF" for tenor in tenors]].to_numpy(dtype="float64")
 
-        if treas_col in df_merged.columns and sf_col in df_merged.columns:
-            # Basis = Treasury - SF, converted to basis points
-            df_merged[output_col] = (df_merged[treas_col] - df_merged[sf_col]) * 100
+    return pd.DataFrame(
+        basis_kernel(treasury, sf),
+        index=df_merged.index,
+        columns=[OUTPUT_COLUMNS[tenor] for tenor in tenors],
+    )
 
-    return df_merged
 
+def ffill_with_staleness(basis_df, max_fill_gap=MAX_FILL_GAP, state=None):
+    """
+    Forward fill basis columns, up to a maximum gap, and track staleness.
+
+    For every series the position of the last real observation is found
+    with a running maximum over the whole (dates x series) array, and the
+    number of business days since that observation is computed in one
+    ``np.busday_count`` call. Values older than ``max_fill_gap`` business
+    days are left missing instead of being carried forward.
+
+    Parameters
+    ----------
+    basis_df : pd.DataFrame
+        Basis columns on a date-sorted index
+    max_fill_gap : int, optional
+        Maximum business days a value may be carried forward. None fills
+        without limit.
+    state : tuple of np.ndarray, optional
+        (last observed values, last observation dates) per column from a
+        preceding block of dates, as returned by a previous call. Used to
+        continue the fill across batch or update boundaries.
+
+    Returns
+    -------
+    filled : pd.DataFrame
+        Forward-filled basis columns
+    staleness : pd.DataFrame
+        Business days since the last real observation of each series
+        (0 on observed dates, NaN before the first observation), with
+        columns suffixed by ``STALENESS_SUFFIX``
+    state : tuple of np.ndarray
+        Fill state after the last date, to pass to the next call
+    """
+    values = basis_df.to_numpy(dtype="float64")
+    n_dates, n_cols = values.shape
+    dates = pd.to_datetime(basis_df.index).to_numpy(dtype="datetime64[D]")
+    stale_cols = [f"{col}{STALENESS_SUFFIX}" for col in basis_df.columns]
+
+    if state is None:
+        state = (
+            np.full(n_cols, np.nan),
+            np.full(n_cols, np.datetime64("NaT"), dtype="datetime64[D]"),
+        )
+    if n_dates == 0:
+        staleness_df = pd.DataFrame(index=basis_df.index, columns=stale_cols, dtype="float64")
+        return basis_df.copy(), staleness_df, state
+
+    # Row 0 holds the seed state, rows 1..n the new dates. Each cell records
+    # the date it was observed, or NaT if it holds no real observation. A
+    # seed with a date but no value (already past the gap) keeps its date.
+    row_dates = np.broadcast_to(dates[:, None], (n_dates, n_cols))
+    values = np.vstack([state[0], values])
+    obs_dates = np.vstack([state[1], row_dates])
+    observed = ~np.isnat(obs_dates)
+    observed[1:] &= ~np.isnan(values[1:])
+    obs_dates[~observed] = np.datetime64("NaT")
+
+    # Row of the last real observation at or before each date; rows without
+    # one point at the seed row, which is NaN/NaT when there is no seed
+    last_obs = np.where(observed, np.arange(n_dates + 1)[:, None], 0)
+    np.maximum.accumulate(last_obs, axis=0, out=last_obs)
+
+    filled = np.take_along_axis(values, last_obs, axis=0)
+    last_dates = np.take_along_axis(obs_dates, last_obs, axis=0)
+    new_state = (filled[-1].copy(), last_dates[-1].copy())
+    filled, last_dates = filled[1:], last_dates[1:]
+
+    # Business days since the last real observation
+    valid = ~np.isnat(last_dates)
+    staleness = np.full(filled.shape, np.nan)
+    staleness[valid] = np.busday_count(last_dates[valid], row_dates[valid])
+
+    if max_fill_gap is not None:
+        filled[staleness > max_fill_gap] = np.nan
+
+    filled_df = pd.DataFrame(filled, index=basis_df.index, columns=basis_df.columns)
+    staleness_df = pd.DataFrame(staleness, index=basis_df.index, columns=stale_cols)
+    return filled_df, staleness_df, new_state
+
+
+def pchip_slopes(x, y):
+    """
+    Knot derivatives of the monotone piecewise cubic (PCHIP) interpolant.
+
+    Uses the Fritsch-Carlson weighted harmonic mean at interior knots and
+    the shape-preserving three-point formula at the ends, for every row of
+    ``y`` at once.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        (knots,) strictly increasing knot positions
+    y : np.ndarray
+        (rows x knots) values at the knots
+
+    Returns
+    -------
+    np.ndarray
+        (rows x knots) derivatives at the knots
+    """
+    h = np.diff(x)
+    delta = np.diff(y, axis=1) / h
+    if len(x) == 2:
+        return np.repeat(delta, 2, axis=1)
+
+    d = np.zeros_like(y)
+
+    # Interior: zero at local extrema, else weighted harmonic mean of the secants
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    left, right = delta[:, :-1], delta[:, 1:]
+    same_sign = left * right > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        harmonic = (w1 + w2) / (w1 / left + w2 / right)
+    d[:, 1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    # Ends: three-point estimate, limited to keep the interpolant monotone
+    for end, (h0, h1, d0, d1) in (
+        (0, (h[0], h[1], delta[:, 0], delta[:, 1])),
+        (-1, (h[-1], h[-2], delta[:, -1], delta[:, -2])),
+    ):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        slope = np.where(np.sign(slope) != np.sign(d0), 0.0, slope)
+        overshoot = (np.sign(d0) != np.sign(d1)) & (np.abs(slope) > 3 * np.abs(d0))
+        d[:, end] = np.where(overshoot, 3 * d0, slope)
+
+    return d
+
+
+def pchip_interpolate(x, y, xi):
+    """
+    Batched PCHIP interpolation of many curves sharing the same knots.
+
+    All rows are evaluated in one matrix operation: the Hermite basis
+    weights depend only on ``x`` and ``xi``, so each output is a weighted
+    sum of the knot values and slopes. Points outside the knots are not
+    extrapolated and come out as NaN.
+
+    Parameters
+    ----------
+    x : array-like
+        (knots,) strictly increasing knot positions, at least two
+    y : np.ndarray
+        (rows x knots) values at the knots, without missing values
+    xi : array-like
+        (points,) positions to evaluate
+
+    Returns
+    -------
+    np.ndarray
+        (rows x points) interpolated values
+    """
+    x = np.asarray(x, dtype="float64")
+    xi = np.asarray(xi, dtype="float64")
+    outside = (xi < x[0]) | (xi > x[-1])
+    xi = np.clip(xi, x[0], x[-1])
+    d = pchip_slopes(x, y)
+
+    j = np.clip(np.searchsorted(x, xi, side="right") - 1, 0, len(x) - 2)
+    h = x[j + 1] - x[j]
+    t = (xi - x[j]) / h
+
+    h00 = (1 + 2 * t) * (1 - t) ** 2
+    h10 = t * (1 - t) ** 2 * h
+    h01 = t**2 * (3 - 2 * t)
+    h11 = t**2 * (t - 1) * h
+    yi = y[:, j] * h00 + d[:, j] * h10 + y[:, j + 1] * h01 + d[:, j + 1] * h11
+    yi[:, outside] = np.nan
+    return yi
+
+
+def compute_treasury_sf_basis_curve(df_merged, curve_years=CURVE_YEARS):
+    """
+    Interpolate the basis across tenors to a dense curve on every date.
+
+    The basis at the quoted tenors (from ``compute_treasury_sf_basis``) is
+    interpolated with monotone cubic (PCHIP) splines in maturity. Dates are
+    processed as a batch per pattern of available tenors (usually just
+    one), never date by date. Dates with fewer than two quoted tenors are
+    left missing, as are maturities outside the range quoted on that date.
+
+    Parameters
+    ----------
+    df_merged : pd.DataFrame
+        DataFrame with Treasury yields and SF rates (from ``prepare_data``)
+    curve_years : list of float
+        Maturities in years of the output curve
+
+    Returns
+    -------
+    pd.DataFrame
+        Basis in basis points at each curve maturity, with columns like
+        'Treasury_SF_7Y' (or 'Treasury_SF_6M' for fractional maturities, see
+        ``ticker_registry.maturity_label``), on the input's index
+    """
+    basis_df = compute_treasury_sf_basis(df_merged)
+    years = ticker_registry.tenor_years()
+    tenor_of = {col: tenor for tenor, col in OUTPUT_COLUMNS.items()}
+    knots = np.array([years[tenor_of[col]] for col in basis_df.columns], dtype="float64")
+
+    values = basis_df.to_numpy(dtype="float64")
+    order = np.argsort(knots)
+    knots, values = knots[order], values[:, order]
+
+    curve = np.full((len(values), len(curve_years)), np.nan)
+    available = ~np.isnan(values)
+    patterns, inverse = np.unique(available, axis=0, return_inverse=True)
+    for k, pattern in enumerate(patterns):
+        if pattern.sum() < 2:
+            continue
+        rows = np.flatnonzero(inverse.ravel() == k)
+        curve[rows] = pchip_interpolate(knots[pattern], values[np.ix_(rows, pattern)], curve_years)
+
+    columns = [
+        f"{ticker_registry.OUTPUT_PREFIX}_{ticker_registry.maturity_label(year)}"
+        for year in curve_years
+    ]
+    return pd.DataFrame(curve, index=basis_df.index, columns=columns)
+
+
+def load_prepared_data(data_dir=DATA_DIR, start_date=None, end_date=None, asof_tolerance=None):
+    """
+    Load both raw datasets and join them with ``prepare_data``.
+
+    Date bounds are pushed down into the parquet reads, so row groups (and
+    year partitions) outside the window are never decoded.
+
+    Returns
+    -------
+    pd.DataFrame
+        Merged DataFrame with standardized column names
+    """
+    data_dir = Path(data_dir)
+    window = {"start_date": start_date, "end_date": end_date or None}
+    treasury_df = pull_bbg_treasury_sf.load_treasury_yields(data_dir=data_dir, **window)
+    sf_df = pull_bbg_treasury_sf.load_sf_rates(data_dir=data_dir, **window)
+    return prepare_data(treasury_df, sf_df, asof_tolerance=asof_tolerance)
+
+
+def compute_filled_basis(df_merged, max_fill_gap=MAX_FILL_GAP, with_staleness=False):
+    """
+    Compute the basis and forward fill it, up to max_fill_gap business days.
+
+    Returns
+    -------
+    pd.DataFrame
+        Basis spreads in basis points, followed by the '<series>_days_stale'
+        columns if with_staleness
+    """
+    basis_df = compute_treasury_sf_basis(df_merged)
+    basis_df, staleness_df, _ = ffill_with_staleness(basis_df, max_fill_gap)
+    if with_staleness:
+        basis_df = pd.concat([basis_df, staleness_df], axis=1)
+    return basis_df
+
+
+def calculate_treasury_sf_basis_curve(
+    end_date=None,
+    data_dir=DATA_DIR,
+    start_date=None,
+    curve_years=CURVE_YEARS,
+):
+    """
+    Calculate the dense Treasury-SF basis curve.
+
+    Parameters
+    ----------
+    end_date, start_date : str, optional
+        Inclusive date bounds
+    data_dir : Path
+        Directory containing the data files
+    curve_years : list of float
+        Maturities in years of the output curve
+
+    Returns
+    -------
+    pd.DataFrame
+        Basis curve in basis points (see ``compute_treasury_sf_basis_curve``)
+    """
+    print(">> Calculating Treasury-SF basis curve...")
+
+    df_merged = load_prepared_data(data_dir, start_date=start_date, end_date=end_date)
+    curve_df = compute_treasury_sf_basis_curve(df_merged, curve_years)
+
+    print(f">> Records: {len(curve_df):,}")
+    return curve_df
 
-def calculate_treasury_sf_basis(end_date=None, data_dir=DATA_DIR):
+
+def calculate_treasury_sf_basis(
+    end_date=None,
+    data_dir=DATA_DIR,
+    start_date=None,
+    max_fill_gap=MAX_FILL_GAP,
+    with_staleness=False,
+    asof_tolerance=None,
+    backend=BACKEND,
+):
     """
     Calculate Treasury-SF basis spreads.
 
+    Date bounds are pushed down into the parquet reads, so row groups (and
+    year partitions) outside the window are never decoded.
+
     Parameters
     ----------
     end_date : str, optional
-        End date for the data
+        End date for the data (inclusive)
     data_dir : Path
         Directory containing the data files
+    start_date : str, optional
+        Start date for the data (inclusive). Values are only forward-filled
+        from observations inside the window.
+    max_fill_gap : int, optional
+        Maximum business days a value is forward-filled (None for no limit)
+    with_staleness : bool
+        Also return one '<series>_days_stale' column per series with the
+        business days since its last real observation
+    asof_tolerance : str or pd.Timedelta, optional
+        As-of join the SF quotes to the Treasury timestamps within this
+        tolerance instead of an exact join (see ``prepare_data``)
+    backend : str
+        "pandas", or "polars" to run the same steps as one lazy Polars
+        query (see ``calculate_treasury_sf_basis_polars``)
 
     Returns
     -------
@@ -148,47 +599,600 @@ def calculate_treasury_sf_basis(end_date=None, data_dir=DATA_DIR):
     """
     data_dir = Path(data_dir)
 
+    if backend == "polars":
+        return calculate_treasury_sf_basis_polars(
+            end_date=end_date,
+            data_dir=data_dir,
+            start_date=start_date,
+            max_fill_gap=max_fill_gap,
+            with_staleness=with_staleness,
+            asof_tolerance=asof_tolerance,
+        )
+    if backend != "pandas":
+        raise ValueError(f"Unknown compute backend: {backend!r}")
+
     print(">> Calculating Treasury-SF basis...")
 
-    # Load data
-    treasury_df = pull_bbg_treasury_sf.load_treasury_yields(data_dir=data_dir)
-    sf_df = pull_bbg_treasury_sf.load_sf_rates(data_dir=data_dir)
+    # Load and prepare data, filtering by date window inside the parquet reads
+    df_merged = load_prepared_data(
+        data_dir, start_date=start_date, end_date=end_date, asof_tolerance=asof_tolerance
+    )
+
+    # Compute basis and forward fill missing values, up to max_fill_gap business days
+    basis_df = compute_filled_basis(df_merged, max_fill_gap, with_staleness)
+
+    print(f">> Records: {len(basis_df):,}")
+    return basis_df
+
+
+def scan_raw_polars(name, data_dir=DATA_DIR, start_date=None, end_date=None):
+    """
+    Lazily scan a raw dataset with Polars, in the wide layout.
+
+    Mirrors ``pull_bbg_treasury_sf.load_raw``: handles the single-file and
+    year-partitioned layouts, pushes the date bounds into the scan, and
+    pivots long-format files back to one 'TICKER_FIELD' column per
+    registered ticker.
+
+    Returns
+    -------
+    pl.LazyFrame
+        Wide raw dataset (date column plus 'TICKER_FIELD' columns)
+    """
+    import polars as pl
+
+    path = pull_bbg_treasury_sf.raw_path(name, data_dir)
+    if path.is_dir():
+        lf = pl.scan_parquet(path / "**" / "*.parquet", hive_partitioning=True)
+        lf = lf.drop(pull_bbg_treasury_sf.PARTITION_COL)
+    else:
+        lf = pl.scan_parquet(path)
+
+    names = lf.collect_schema().names()
+    date_col = "date" if "ticker" in names else pull_bbg_treasury_sf.DATE_COL
+    if start_date is not None:
+        lf = lf.filter(pl.col(date_col) >= pd.Timestamp(start_date).date())
+    if end_date is not None:
+        lf = lf.filter(pl.col(date_col) <= pd.Timestamp(end_date).date())
+
+    if date_col == "date":
+        tickers = (
+            pull_bbg_treasury_sf.TREASURY_TICKERS
+            if name == "treasury_yields"
+            else pull_bbg_treasury_sf.SF_TICKERS
+        )
+        # Lazy pivot over the known tickers and fields
+        lf = lf.group_by("date").agg(
+            pl.col("value")
+            .filter((pl.col("ticker") == ticker) & (pl.col("field") == field))
+            .first()
+            .alias(f"{ticker}_{field}")
+            for ticker in tickers
+            for field in pull_bbg_treasury_sf.FIELDS
+        )
+        lf = lf.rename({"date": pull_bbg_treasury_sf.DATE_COL})
+
+    return lf.sort(pull_bbg_treasury_sf.DATE_COL)
+
+
+def calculate_treasury_sf_basis_polars(
+    end_date=None,
+    data_dir=DATA_DIR,
+    start_date=None,
+    max_fill_gap=MAX_FILL_GAP,
+    with_staleness=False,
+    asof_tolerance=None,
+):
+    """
+    Calculate Treasury-SF basis spreads as a lazy Polars query.
+
+    Runs the same load, join, basis and gap-limited forward fill steps as
+    the pandas path, but builds them into one query plan that Polars
+    optimizes and executes multi-threaded, with the date bounds pushed into
+    the parquet scans. Parameters and output match
+    ``calculate_treasury_sf_basis``.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with basis spreads in basis points
+    """
+    # import here so that polars stays an optional dependency
+    import polars as pl
+
+    data_dir = Path(data_dir)
+    date_col = pull_bbg_treasury_sf.DATE_COL
+
+    print(">> Calculating Treasury-SF basis (polars)...")
+
+    def standardize(name, kind):
+        lf = scan_raw_polars(name, data_dir, start_date=start_date, end_date=end_date)
+        columns = tuple(c for c in lf.collect_schema().names() if c != date_col)
+        return lf.rename(dict(zip(columns, resolve_columns(columns, kind))))
 
-    # Prepare data
-    df_merged = prepare_data(treasury_df, sf_df)
+    treasury = standardize("treasury_yields", "Treasury")
+    sf = standardize("sf_rates", "SF")
 
-    # Filter by end date if specified
-    if end_date:
-        date = pd.Timestamp(end_date).date()
-        df_merged = df_merged.loc[:date]
+    if asof_tolerance is not None:
+        merged = treasury.join_asof(
+            sf,
+            on=date_col,
+            strategy="backward",
+            tolerance=pd.Timedelta(asof_tolerance).to_pytimedelta(),
+        )
+    else:
+        merged = treasury.join(sf, on=date_col, how="inner").sort(date_col)
 
-    # Compute basis
-    df_merged = compute_treasury_sf_basis(df_merged)
+    names = set(merged.collect_schema().names())
+    tenors = [
+        tenor
+        for tenor in OUTPUT_COLUMNS
+        if f"{tenor}_Treasury" in names and f"{tenor}_SF" in names
+    ]
+    series = [OUTPUT_COLUMNS[tenor] for tenor in tenors]
+
+    # Basis in basis points; NaN and null are both treated as missing
+    basis = merged.select(
+        pl.col(date_col),
+        *(
+            ((pl.col(f"{tenor}_Treasury") - pl.col(f"{tenor}_SF")) * BPS_PER_PERCENT)
+            .cast(pl.Float64)
+            .fill_nan(None)
+            .alias(OUTPUT_COLUMNS[tenor])
+            for tenor in tenors
+        ),
+    )
 
-    # Extract just the basis columns
-    basis_cols = [col for col in OUTPUT_COLUMNS.values() if col in df_merged.columns]
-    basis_df = df_merged[basis_cols].copy()
+    # Business days since each series' last real observation, then the
+    # forward fill limited to max_fill_gap of them
+    day = pl.col(date_col).cast(pl.Date)
+    staleness = [
+        pl.business_day_count(
+            pl.when(pl.col(col).is_not_null()).then(day).forward_fill(), day
+        )
+        .cast(pl.Float64)
+        .alias(f"{col}{STALENESS_SUFFIX}")
+        for col in series
+    ]
+    basis = basis.with_columns(staleness)
 
-    # Forward fill missing values
-    basis_df = basis_df.ffill()
+    filled = []
+    for col in series:
+        expr = pl.col(col).forward_fill()
+        if max_fill_gap is not None:
+            expr = pl.when(pl.col(f"{col}{STALENESS_SUFFIX}") <= max_fill_gap).then(expr)
+        filled.append(expr.alias(col))
+    basis = basis.with_columns(filled)
+
+    columns = series + ([f"{col}{STALENESS_SUFFIX}" for col in series] if with_staleness else [])
+    result = basis.collect()
+
+    basis_df = result.select(columns).to_pandas().fillna(np.nan)
+    basis_df.index = pd.Index(result[date_col].to_list(), name=date_col)
 
     print(f">> Records: {len(basis_df):,}")
     return basis_df
 
 
+def calculate_treasury_sf_basis_asof(
+    as_of_dates,
+    data_dir=DATA_DIR,
+    max_fill_gap=MAX_FILL_GAP,
+    with_staleness=False,
+):
+    """
+    Calculate Treasury-SF basis snapshots for many as-of dates at once.
+
+    The data is loaded, merged and computed once, up to the latest as-of
+    date. Because the forward fill is causal, each snapshot equals
+    ``calculate_treasury_sf_basis(end_date=as_of)`` and is returned as a
+    prefix slice of that single frame rather than recomputed.
+
+    Parameters
+    ----------
+    as_of_dates : iterable of str or date
+        As-of (end) dates
+    data_dir : Path
+        Directory containing the data files
+    max_fill_gap, with_staleness
+        As in ``calculate_treasury_sf_basis``
+
+    Returns
+    -------
+    dict
+        Mapping of each as-of date (as given) to its basis DataFrame
+    """
+    as_of_dates = list(as_of_dates)
+    if not as_of_dates:
+        return {}
+
+    bounds = pd.to_datetime(as_of_dates)
+    basis_df = calculate_treasury_sf_basis(
+        end_date=bounds.max(),
+        data_dir=data_dir,
+        max_fill_gap=max_fill_gap,
+        with_staleness=with_staleness,
+    )
+
+    # Row count of each prefix: number of dates <= as-of date
+    dates = pd.to_datetime(basis_df.index).to_numpy()
+    lengths = np.searchsorted(dates, bounds.to_numpy(), side="right")
+
+    return {d: basis_df.iloc[:n] for d, n in zip(as_of_dates, lengths)}
+
+
 def load_treasury_sf_basis(data_dir=DATA_DIR):
-    """Load calculated Treasury-SF basis from parquet file."""
+    """Load calculated Treasury-SF basis from parquet file (widened to float64)."""
+    path = data_dir / "treasury_sf_basis.parquet"
+    return basis_storage.read_parquet(path)
+
+
+def save_treasury_sf_basis(basis_df, path, compact=COMPACT):
+    """Save basis output, storing the basis (not staleness) columns in the compact mode."""
+    columns = [col for col in basis_df.columns if not col.endswith(STALENESS_SUFFIX)]
+    basis_storage.write_parquet(
+        basis_df, path, columns, compact, row_group_size=BASIS_ROW_GROUP_SIZE
+    )
+
+
+def save_treasury_sf_basis_curve(curve_df, path, compact=COMPACT):
+    """Save the dense basis curve, storing its values in the compact mode."""
+    basis_storage.write_parquet(curve_df, path, list(curve_df.columns), compact)
+
+
+def replace_parquet_tail(path, head, tail):
+    """
+    Rewrite a parquet file as ``head`` followed by ``tail``, atomically.
+
+    ``head`` is the kept prefix of the file exactly as stored, so compacted
+    columns are copied without widening; ``tail`` is cast to its schema.
+    The whole file is rewritten into a temporary file that then replaces the
+    original, so the cost grows with the stored history (one row per date
+    for the basis output).
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    schema = head.schema
+
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        writer.write_table(head, row_group_size=BASIS_ROW_GROUP_SIZE)
+        writer.write_table(
+            tail.select(schema.names).cast(schema), row_group_size=BASIS_ROW_GROUP_SIZE
+        )
+    os.replace(tmp_path, path)
+
+
+def update_treasury_sf_basis(
+    data_dir=DATA_DIR,
+    max_fill_gap=MAX_FILL_GAP,
+    compact=None,
+    overlap_days=pull_bbg_treasury_sf.INCREMENTAL_OVERLAP_DAYS,
+):
+    """
+    Incrementally bring treasury_sf_basis.parquet up to date with the raw data.
+
+    The last ``overlap_days`` business days before the last stored date are
+    recomputed together with the new dates, so raw values revised inside
+    that window (the window re-requested by the incremental pull) replace
+    the stored basis. Raw rows are loaded only from the start of the window;
+    the last stored row before it (filled values plus staleness) seeds the
+    forward fill. Stored rows before the window are kept as they are, so
+    revisions older than the window need a full recomputation.
+
+    The stored rows from the window onward are replaced by the recomputed
+    ones and the file is rewritten atomically. Falls back to a full
+    recomputation if no output exists yet, no stored row precedes the
+    window, or the columns no longer match the registry.
+
+    Parameters
+    ----------
+    data_dir : Path
+        Directory containing the raw data and the basis output
+    max_fill_gap : int, optional
+        Maximum business days a value is forward-filled; should match the
+        value used to build the stored output
+    compact : str, optional
+        Storage mode for a recomputed output ("float32" or "int32").
+        Defaults to the mode of the stored output; recomputed tail rows
+        always use the stored output's mode.
+    overlap_days : int
+        Number of business days before the last stored date to recompute
+
+    Returns
+    -------
+    int
+        Number of dates added after the last stored date (or written, on a
+        full recomputation)
+    """
+    data_dir = Path(data_dir)
     path = data_dir / "treasury_sf_basis.parquet"
-    return pd.read_parquet(path)
 
+    def recompute():
+        basis_df = calculate_treasury_sf_basis(
+            data_dir=data_dir, max_fill_gap=max_fill_gap, with_staleness=True
+        )
+        save_treasury_sf_basis(basis_df, path, compact)
+        return len(basis_df)
+
+    if not path.exists():
+        return recompute()
+
+    stored = pq.read_table(path)
+    stored_mode = basis_storage.storage_mode(stored.schema)
+    compact = compact or stored_mode
+
+    # Keep stored rows before the overlap window; the last of them is the seed
+    date_col = stored.schema.pandas_metadata["index_columns"][0]
+    dates = stored.column(date_col).to_numpy().astype("datetime64[D]")
+    last_date = pd.Timestamp(dates[-1])
+    window_start = last_date - pd.offsets.BDay(overlap_days)
+    head = stored.slice(0, int(np.searchsorted(dates, np.datetime64(window_start.date(), "D"))))
+    if head.num_rows == 0:
+        print("   No stored rows before the overlap window, recomputing full history")
+        return recompute()
+    seed = basis_storage.widen_table(head.slice(head.num_rows - 1)).to_pandas()
+
+    print(
+        f">> Updating Treasury-SF basis from {window_start:%Y-%m-%d} "
+        f"(last stored {last_date:%Y-%m-%d})..."
+    )
+    treasury_df = pull_bbg_treasury_sf.load_treasury_yields(data_dir=data_dir, start_date=window_start)
+    sf_df = pull_bbg_treasury_sf.load_sf_rates(data_dir=data_dir, start_date=window_start)
+    basis_df = compute_treasury_sf_basis(prepare_data(treasury_df, sf_df))
+
+    basis_cols = list(basis_df.columns)
+    stale_cols = [f"{col}{STALENESS_SUFFIX}" for col in basis_cols]
+    if basis_cols + stale_cols != list(seed.columns):
+        print("   Output columns changed, recomputing full history")
+        return recompute()
+
+    # Rebuild the fill state (last observed value and date) from the seed row
+    stale = seed[stale_cols].to_numpy(dtype="float64")[0]
+    has_obs = ~np.isnan(stale)
+    seed_day = np.datetime64(pd.Timestamp(seed.index[-1]).date(), "D")
+    obs_dates = np.full(len(stale), np.datetime64("NaT"), dtype="datetime64[D]")
+    obs_dates[has_obs] = np.busday_offset(seed_day, -stale[has_obs].astype(int), roll="backward")
+    state = (seed[basis_cols].to_numpy(dtype="float64")[0], obs_dates)
+
+    filled, staleness, _ = ffill_with_staleness(basis_df, max_fill_gap, state=state)
+    tail = pd.concat([filled, staleness], axis=1)
+    table = basis_storage.compact_table(pa.Table.from_pandas(tail), basis_cols, stored_mode)
+    replace_parquet_tail(path, head, table)
+
+    new_dates = int((pd.to_datetime(tail.index) > last_date).sum())
+    print(f">> Recomputed {len(tail):,} rows ({new_dates:,} new dates)")
+    return new_dates
+
+
+def iter_raw_batches(name, data_dir=DATA_DIR, batch_size=STREAM_BATCH_SIZE):
+    """
+    Iterate a wide raw dataset as date-indexed DataFrames of at most batch_size rows.
+
+    Both the single-file and the year-partitioned layouts are supported;
+    partitions are visited in path (i.e. year) order, so batches arrive in
+    date order.
+    """
+    path = pull_bbg_treasury_sf.raw_path(name, data_dir)
+    dataset = ds.dataset(path, format="parquet")
+    if "ticker" in dataset.schema.names:
+        raise ValueError("Streaming requires the wide raw layout")
+
+    for fragment in sorted(dataset.get_fragments(), key=lambda f: f.path):
+        for batch in fragment.to_batches(batch_size=batch_size):
+            if batch.num_rows:
+                df = batch.to_pandas()
+                yield df.set_index(pull_bbg_treasury_sf.DATE_COL)
+
+
+def merge_join_batches(left_batches, right_batches):
+    """
+    Inner-join two date-sorted streams of DataFrames on their index.
+
+    Rows are buffered only until the other stream has caught up to their
+    date, so at most about one batch per side is held in memory at a time.
+
+    Yields
+    ------
+    tuple of pd.DataFrame
+        (left, right) slices covering the same date range, ready for
+        ``prepare_data``
+    """
+    left_batches = iter(left_batches)
+    right_batches = iter(right_batches)
+    left = right = None
+
+    while True:
+        if left is None or left.empty:
+            left = next(left_batches, None)
+        if right is None or right.empty:
+            right = next(right_batches, None)
+        if left is None or right is None:
+            return
 
-def main():
+        # Everything up to the earlier of the two buffer ends can be joined now
+        bound = min(left.index[-1], right.index[-1])
+        yield left.loc[left.index <= bound], right.loc[right.index <= bound]
+
+        left = left.loc[left.index > bound]
+        right = right.loc[right.index > bound]
+
+
+def stream_treasury_sf_basis(
+    data_dir=DATA_DIR,
+    output_path=None,
+    batch_size=STREAM_BATCH_SIZE,
+    max_fill_gap=MAX_FILL_GAP,
+    compact=COMPACT,
+):
+    """
+    Compute the Treasury-SF basis in a single streaming pass over record batches.
+
+    Record batches are read from both raw sources in date order, merge-joined
+    on the fly, and the basis is computed and written batch by batch. The
+    forward-fill state (last valid value per column) is carried across batch
+    boundaries, so the output matches
+    ``calculate_treasury_sf_basis(with_staleness=True)`` while peak memory is
+    bounded by the batch size.
+
+    Parameters
+    ----------
+    data_dir : Path
+        Directory containing the raw data files
+    output_path : Path, optional
+        Output parquet file. Defaults to ``data_dir / "treasury_sf_basis.parquet"``.
+    batch_size : int
+        Rows per record batch read from each raw source
+    max_fill_gap : int, optional
+        Maximum business days a value is forward-filled (None for no limit)
+    compact : str, optional
+        Store the basis values as "float32" or "int32" (see basis_storage.py)
+
+    Returns
+    -------
+    int
+        Number of rows written
+    """
+    data_dir = Path(data_dir)
+    output_path = Path(output_path) if output_path else data_dir / "treasury_sf_basis.parquet"
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+
+    print(">> Streaming Treasury-SF basis...")
+
+    pairs = merge_join_batches(
+        iter_raw_batches("treasury_yields", data_dir, batch_size),
+        iter_raw_batches("sf_rates", data_dir, batch_size),
+    )
+
+    writer = None
+    state = None
+    n_rows = 0
+    try:
+        for treasury_df, sf_df in pairs:
+            basis_df = compute_treasury_sf_basis(prepare_data(treasury_df, sf_df))
+            if basis_df.empty:
+                continue
+
+            # Carry the forward fill across the batch boundary
+            filled, staleness, state = ffill_with_staleness(basis_df, max_fill_gap, state=state)
+            basis_df = pd.concat([filled, staleness], axis=1)
+
+            table = basis_storage.compact_table(
+                pa.Table.from_pandas(basis_df), list(filled.columns), compact
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            n_rows += len(basis_df)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        raise ValueError("No overlapping Treasury and SF dates to stream")
+    os.replace(tmp_path, output_path)
+
+    print(f">> Records: {n_rows:,}")
+    return n_rows
+
+
+def main(
+    incremental=False,
+    streaming=False,
+    batch_size=STREAM_BATCH_SIZE,
+    max_fill_gap=MAX_FILL_GAP,
+    asof_tolerance=None,
+    backend=BACKEND,
+    compact=COMPACT,
+):
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    basis_df = calculate_treasury_sf_basis(data_dir=DATA_DIR)
-    basis_df.to_parquet(DATA_DIR / "treasury_sf_basis.parquet")
+    if streaming:
+        stream_treasury_sf_basis(
+            data_dir=DATA_DIR,
+            batch_size=batch_size,
+            max_fill_gap=max_fill_gap,
+            compact=compact,
+        )
+        print(">> Saved treasury_sf_basis.parquet")
+        return
+
+    if incremental:
+        update_treasury_sf_basis(data_dir=DATA_DIR, max_fill_gap=max_fill_gap, compact=compact)
+        print(">> Updated treasury_sf_basis.parquet")
+        return
+
+    # One read and join of the raw data for both the basis and the curve
+    df_merged = load_prepared_data(DATA_DIR, asof_tolerance=asof_tolerance)
+
+    if backend == "pandas":
+        print(">> Calculating Treasury-SF basis...")
+        basis_df = compute_filled_basis(df_merged, max_fill_gap, with_staleness=True)
+    else:
+        # Other backends run their own query over the raw files
+        basis_df = calculate_treasury_sf_basis(
+            data_dir=DATA_DIR,
+            max_fill_gap=max_fill_gap,
+            with_staleness=True,
+            asof_tolerance=asof_tolerance,
+            backend=backend,
+        )
+    save_treasury_sf_basis(basis_df, DATA_DIR / "treasury_sf_basis.parquet", compact)
     print(">> Saved treasury_sf_basis.parquet")
 
+    curve_df = compute_treasury_sf_basis_curve(df_merged)
+    save_treasury_sf_basis_curve(curve_df, DATA_DIR / "treasury_sf_basis_curve.parquet", compact)
+    print(">> Saved treasury_sf_basis_curve.parquet")
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Recompute only the overlap window and new dates of treasury_sf_basis.parquet",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Compute the basis batch by batch with bounded memory",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=STREAM_BATCH_SIZE,
+        help="Rows per record batch in streaming mode",
+    )
+    parser.add_argument(
+        "--max-fill-gap",
+        type=int,
+        default=MAX_FILL_GAP,
+        help="Maximum business days a basis value is forward-filled (default: no limit)",
+    )
+    parser.add_argument(
+        "--asof-tolerance",
+        default=None,
+        help="As-of join SF quotes to Treasury timestamps within this tolerance, "
+        "e.g. '5min' for intraday snaps (default: exact join)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["pandas", "polars"],
+        default=BACKEND,
+        help="Compute backend for the full calculation (polars must be installed)",
+    )
+    parser.add_argument(
+        "--compact",
+        choices=basis_storage.STORAGE_MODES,
+        default=COMPACT,
+        help="Store basis values as float32 or as int32 hundredths of a bp (default: float64)",
+    )
+    args = parser.parse_args()
+    main(
+        incremental=args.incremental,
+        streaming=args.streaming,
+        batch_size=args.batch_size,
+        max_fill_gap=args.max_fill_gap,
+        asof_tolerance=args.asof_tolerance,
+        backend=args.backend,
+        compact=args.compact,
+    )
@@ -3,49 +3,408 @@ Create FTSFR standardized datasets for Treasury-SF basis.
 
 Outputs:
 - ftsfr_treasury_sf_basis.parquet: Treasury-SF basis spreads in basis points
+
+The file is sorted by (unique_id, ds) with one zstd-compressed row group
+per series, unique_id dictionary-encoded, and sorting metadata and min/max
+statistics recorded, so readers filtering to a series or date window can
+skip most row groups. Pass --compact float32 (or int32) to store the values
+compactly; see basis_storage.py.
+
+Pass --partitioned to write ftsfr_treasury_sf_basis/ instead: one file per
+series plus a manifest, so readers open only the series they need. On that
+layout, --incremental rewrites only the last few business days and the new
+dates, as new fragment files, and swaps in an updated manifest. It refuses
+to run if the partitioned layout has not been built.
 """
 
+import argparse
+import json
+import os
+import shutil
 import sys
 from pathlib import Path
 
 sys.path.insert(0, "./src")
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
+import basis_storage
 import chartbook
 import calc_treasury_sf_basis
+import pull_bbg_treasury_sf
 
 BASE_DIR = chartbook.env.get_project_root()
 DATA_DIR = BASE_DIR / "_data"
 
+# Name of the FTSFR dataset (file '<name>.parquet' or directory '<name>/')
+FTSFR_NAME = "ftsfr_treasury_sf_basis"
+
+# Parquet compression codec for the FTSFR outputs
+COMPRESSION = "zstd"
+
+# Only unique_id is dictionary-encoded. Sorted dates delta-encode to a few bits
+# per row, and byte-stream-split values compress far better than a
+# per-row-group dictionary of distinct floats.
+COLUMN_ENCODING = {"ds": "DELTA_BINARY_PACKED", "y": "BYTE_STREAM_SPLIT"}
+
+# Sort order of the FTSFR long format
+SORT_ORDER = [("unique_id", "ascending"), ("ds", "ascending")]
+
+
+def wide_to_long(df_wide):
+    """
+    Reshape a date-indexed wide frame to the FTSFR long format.
+
+    With the columns in sorted order and the dates sorted, a column-major
+    ravel of the values already lists the rows in (unique_id, ds) order, so
+    no sort is needed. Missing values are dropped with one mask over the
+    raveled values, and each output column is gathered once.
+
+    Parameters
+    ----------
+    df_wide : pd.DataFrame
+        Series as columns, on a date index
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns unique_id (categorical), ds, y sorted by (unique_id, ds),
+        without missing y
+    """
+    if not df_wide.index.is_monotonic_increasing:
+        df_wide = df_wide.sort_index(kind="stable")
+    columns = sorted(df_wide.columns)
+    dates = pd.to_datetime(df_wide.index).to_numpy()
+
+    # Column-major (order="F") ravel: all dates of the first series, then the next
+    values = df_wide[columns].to_numpy(dtype="float64").ravel(order="F")
+    keep = np.flatnonzero(~np.isnan(values))
+    series, row = np.divmod(keep, len(dates))
+
+    return pd.DataFrame(
+        {
+            "unique_id": pd.Categorical.from_codes(series, categories=columns),
+            "ds": dates[row],
+            "y": values[keep],
+        }
+    )
+
+
+def write_ftsfr_parquet(df_long, path, compact=None):
+    """
+    Write a sorted FTSFR long frame to parquet, one row group per series.
+
+    Parameters
+    ----------
+    df_long : pd.DataFrame
+        Columns unique_id, ds, y sorted by (unique_id, ds)
+    path : Path
+        Output parquet file, replaced atomically
+    compact : str, optional
+        Store y as "float32" or "int32" (see basis_storage.py)
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    table = pa.Table.from_pandas(df_long, preserve_index=False)
+    table = basis_storage.compact_table(table, ["y"], compact)
+
+    # Row group boundaries where unique_id changes
+    codes = pd.Categorical(df_long["unique_id"]).codes
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(df_long)]])
+
+    with pq.ParquetWriter(
+        tmp_path,
+        table.schema,
+        compression=COMPRESSION,
+        use_dictionary=["unique_id"],
+        column_encoding=COLUMN_ENCODING,
+        write_statistics=True,
+        sorting_columns=pq.SortingColumn.from_ordering(table.schema, SORT_ORDER),
+    ) as writer:
+        for start, end in zip(starts, ends):
+            if end > start:
+                writer.write_table(table.slice(start, end - start), row_group_size=end - start)
+    os.replace(tmp_path, path)
+
+
+def write_ftsfr_partitioned(df_long, directory, compact=None):
+    """
+    Write a sorted FTSFR long frame as one parquet file per series plus a manifest.
+
+    The manifest ('_manifest.json') lists, per unique_id, its files (each
+    with its own row count and first/last ds), row count and first/last ds.
+    The directory is built next to the target and swapped in atomically.
+
+    Parameters
+    ----------
+    df_long : pd.DataFrame
+        Columns unique_id, ds, y sorted by (unique_id, ds)
+    directory : Path
+        Output directory
+    compact : str, optional
+        Store y as "float32" or "int32" (see basis_storage.py)
+    """
+    directory = Path(directory)
+    tmp_dir = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    series = {}
+    for unique_id, group in df_long.groupby("unique_id", observed=True, sort=True):
+        file_name = f"{unique_id}.parquet"
+        write_ftsfr_parquet(group, tmp_dir / file_name, compact)
+        extent = {
+            "rows": len(group),
+            "start": group["ds"].iloc[0].strftime("%Y-%m-%d"),
+            "end": group["ds"].iloc[-1].strftime("%Y-%m-%d"),
+        }
+        series[str(unique_id)] = {"files": [{"path": file_name, **extent}], **extent}
+
+    manifest = {"columns": ["unique_id", "ds", "y"], "compact": compact, "series": series}
+    write_manifest(tmp_dir, manifest)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def write_manifest(directory, manifest):
+    """Write a dataset manifest atomically, so readers see the old or the new one."""
+    path = Path(directory) / basis_storage.MANIFEST_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, path)
+
+
+def save_ftsfr(df_long, data_dir=DATA_DIR, compact=None, partitioned=False):
+    """
+    Save the FTSFR dataset as a single file or series-partitioned directory.
+
+    Writing one layout removes any stored copy in the other, so readers
+    never see stale data.
 
-def main():
+    Returns
+    -------
+    Path
+        The file or directory written
+    """
+    data_dir = Path(data_dir)
+    file_path = data_dir / f"{FTSFR_NAME}.parquet"
+    dir_path = data_dir / FTSFR_NAME
+
+    if partitioned:
+        write_ftsfr_partitioned(df_long, dir_path, compact)
+        file_path.unlink(missing_ok=True)
+        return dir_path
+
+    write_ftsfr_parquet(df_long, file_path, compact)
+    shutil.rmtree(dir_path, ignore_errors=True)
+    return file_path
+
+
+def clip_fragments(directory, files, window_start):
+    """
+    Drop or clip a series' fragment entries at the start of an update window.
+
+    Fragments starting inside the window are dropped and fragments
+    overlapping it get their manifest 'end' moved before it (with the row
+    count re-read from the ds column); the files themselves are not touched.
+
+    Returns
+    -------
+    list of dict
+        The kept fragment entries
+    """
+    clip_end = (window_start - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    kept = []
+    for file in files:
+        if pd.Timestamp(file["start"]) >= window_start:
+            continue
+        if pd.Timestamp(file["end"]) >= window_start:
+            ds = pq.read_table(
+                Path(directory) / file["path"],
+                columns=["ds"],
+                filters=[("ds", ">=", pd.Timestamp(file["start"])), ("ds", "<", window_start)],
+            )
+            file = {**file, "rows": ds.num_rows, "end": clip_end}
+        kept.append(file)
+    return kept
+
+
+def update_ftsfr(
+    data_dir=DATA_DIR,
+    compact=None,
+    overlap_days=pull_bbg_treasury_sf.INCREMENTAL_OVERLAP_DAYS,
+):
+    """
+    Bring the series-partitioned FTSFR dataset up to date with the basis output.
+
+    Each series' update window starts ``overlap_days`` business days before
+    its own last ds in the manifest, matching the window the incremental
+    pull and basis update recompute. Series sharing a window are read
+    together, and only their columns and the rows of
+    treasury_sf_basis.parquet (the calc stage output) from the window on
+    are decoded. Each series' rows in its window are written as a new
+    fragment file, so a series that stopped updating does not widen the
+    window of the others.
+
+    Existing files are never modified. Fragments overlapping the window are
+    clipped in the manifest (their 'end' is moved before the window, and
+    readers apply it as a ds bound), and fragments entirely inside it are
+    dropped, so revised values replace the stored ones. The manifest is
+    swapped in atomically, so concurrent readers always see a consistent
+    dataset. Dropped files are deleted on the following update, once no
+    current manifest refers to them.
+
+    The work done depends on the windows, not on the length of the history.
+    The layout must already exist (see ``save_ftsfr``); if the basis output
+    has gained or lost series, the dataset is rebuilt in full from it.
+
+    Parameters
+    ----------
+    data_dir : Path
+        Directory containing treasury_sf_basis.parquet and the FTSFR dataset
+    compact : str, optional
+        Storage mode for a full rebuild. New fragments always use the stored
+        dataset's mode.
+    overlap_days : int
+        Number of business days before each series' last ds to rewrite
+
+    Returns
+    -------
+    int
+        Number of rows written (in the windows, or in total on a full rebuild)
+
+    Raises
+    ------
+    FileNotFoundError
+        If the series-partitioned layout does not exist
+    """
+    data_dir = Path(data_dir)
+    directory = data_dir / FTSFR_NAME
+    basis_path = data_dir / "treasury_sf_basis.parquet"
+    date_col = pull_bbg_treasury_sf.DATE_COL
+
+    if basis_storage.ftsfr_directory(directory) is None:
+        raise FileNotFoundError(
+            f"No series-partitioned {FTSFR_NAME}/ in {data_dir}; incremental updates "
+            "need that layout, so build it first with --partitioned"
+        )
+
+    manifest = basis_storage.read_manifest(directory)
+    entries = manifest["series"]
+    compact = compact or manifest.get("compact")
+    previous = {file["path"] for entry in entries.values() for file in entry["files"]}
+
+    basis_cols = [
+        name for name in pq.read_schema(basis_path).names
+        if name != date_col and not name.endswith(calc_treasury_sf_basis.STALENESS_SUFFIX)
+    ]
+    if set(basis_cols) != set(entries):
+        print("   Series changed, rebuilding")
+        basis_df = basis_storage.read_parquet(basis_path, columns=[date_col, *basis_cols])
+        df_long = wide_to_long(basis_df)
+        save_ftsfr(df_long, data_dir, compact, partitioned=True)
+        return len(df_long)
+
+    # Group series by their own window start
+    windows = {}
+    for name, entry in entries.items():
+        window_start = pd.Timestamp(entry["end"]) - pd.offsets.BDay(overlap_days)
+        windows.setdefault(window_start, []).append(name)
+
+    print(f">> Updating {FTSFR_NAME} ({len(windows)} windows)...")
+    manifest["version"] = manifest.get("version", 0) + 1
+    written = 0
+    for window_start, names in sorted(windows.items()):
+        # Only these series' columns, and row groups from the window on, are decoded
+        basis_df = basis_storage.read_parquet(
+            basis_path,
+            columns=[date_col, *names],
+            filters=[(date_col, ">=", window_start.date())],
+        )
+        for name in names:
+            entries[name]["files"] = clip_fragments(directory, entries[name]["files"], window_start)
+
+        # Write the window as one new fragment per series
+        df_long = wide_to_long(basis_df)
+        for unique_id, group in df_long.groupby("unique_id", observed=True, sort=True):
+            file_name = f"{unique_id}.{manifest['version']}.parquet"
+            write_ftsfr_parquet(group, directory / file_name, manifest.get("compact"))
+            entries[unique_id]["files"].append(
+                {
+                    "path": file_name,
+                    "rows": len(group),
+                    "start": group["ds"].iloc[0].strftime("%Y-%m-%d"),
+                    "end": group["ds"].iloc[-1].strftime("%Y-%m-%d"),
+                }
+            )
+        print(f"   {len(names)} series from {window_start.date()}: {len(df_long):,} rows")
+        written += len(df_long)
+
+    for entry in entries.values():
+        entry["rows"] = sum(file["rows"] for file in entry["files"])
+        if entry["files"]:
+            entry["start"] = entry["files"][0]["start"]
+            entry["end"] = entry["files"][-1]["end"]
+
+    write_manifest(directory, manifest)
+
+    # Delete files dropped by an earlier update (no manifest refers to them now)
+    current = {file["path"] for entry in entries.values() for file in entry["files"]}
+    for path in directory.glob("*.parquet"):
+        if path.name not in current | previous:
+            path.unlink()
+
+    print(f">> Wrote {written:,} rows")
+    return written
+
+
+def main(compact=None, partitioned=False, incremental=False):
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+    if incremental:
+        update_ftsfr(DATA_DIR, compact)
+        return
+
     print(">> Creating ftsfr_treasury_sf_basis...")
 
     # Calculate basis spreads
     df_all = calc_treasury_sf_basis.calculate_treasury_sf_basis(data_dir=DATA_DIR)
 
-    # Convert from wide to long format
-    df_stacked = df_all.stack().reset_index()
-    df_stacked.columns = ["ds", "unique_id", "y"]
-
-    # Reorder columns to FTSFR standard: unique_id, ds, y
-    df_stacked = df_stacked[["unique_id", "ds", "y"]]
-    df_stacked["ds"] = pd.to_datetime(df_stacked["ds"])
-
-    # Clean up
-    df_stacked = df_stacked.dropna()
-    df_stacked = df_stacked.sort_values(by=["unique_id", "ds"]).reset_index(drop=True)
+    # Convert from wide to long FTSFR format: unique_id, ds, y
+    df_stacked = wide_to_long(df_all)
 
     # Save
-    output_path = DATA_DIR / "ftsfr_treasury_sf_basis.parquet"
-    df_stacked.to_parquet(output_path, index=False)
+    output_path = save_ftsfr(df_stacked, DATA_DIR, compact, partitioned)
     print(f"   Saved: {output_path.name}")
     print(f"   Records: {len(df_stacked):,}")
     print(f"   Series: {df_stacked['unique_id'].nunique()}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--compact",
+        choices=basis_storage.STORAGE_MODES,
+        default=None,
+        help="Store y as float32 or as int32 hundredths of a bp (default: float64)",
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="Write one file per series plus a manifest instead of a single file",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Rewrite the overlap window and new dates of the existing partitioned "
+        "layout as new fragment files (reads treasury_sf_basis.parquet)",
+    )
+    args = parser.parse_args()
+    main(compact=args.compact, partitioned=args.partitioned, incremental=args.incremental)
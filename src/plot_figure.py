@@ -11,6 +11,8 @@ from typing import Optional
 import pandas as pd
 import plotly.graph_objects as go
 
+import basis_storage
+import ticker_registry
 from settings import config
 
 # Defaults for plotting windows
@@ -21,19 +23,29 @@ DATA_DIR = config("DATA_DIR")
 OUTPUT_DIR = config("OUTPUT_DIR")
 
 
-def load_treasury_sf_data(file_path: Path) -> pd.DataFrame:
+def load_treasury_sf_data(
+    file_path: Path,
+    series: Optional[list[str]] = None,
+    start_date: Optional[date | pd.Timestamp] = None,
+) -> pd.DataFrame:
     """
     Load Treasury-SF basis data from parquet file.
 
     Parameters
-    - file_path: Path to the parquet file
+    - file_path: Path to the parquet file (the series-partitioned
+      '<name>/' directory is used instead when it exists)
+    - series: unique_id values to load (None loads all series)
+    - start_date: Earliest date to load (None loads the full history)
 
     Returns
     - DataFrame with basis spreads pivoted to wide format (date index, tenor columns)
     """
-    df = pd.read_parquet(file_path)
+    # Only the requested series are read; compactly stored values are
+    # widened back to float64
+    df = basis_storage.read_ftsfr(file_path, series=series, start_date=start_date)
 
     # Pivot from long format (unique_id, ds, y) to wide format
+    df["unique_id"] = df["unique_id"].astype(str)
     df_wide = df.pivot(index="ds", columns="unique_id", values="y")
     df_wide.index = pd.to_datetime(df_wide.index)
 
@@ -62,14 +74,14 @@ def plot_figure(
     end_dt = pd.to_datetime(end_date).date() if end_date is not None else None
 
     # Tenor columns in order
-    tenors = ["Treasury_SF_2Y", "Treasury_SF_5Y", "Treasury_SF_10Y", "Treasury_SF_20Y", "Treasury_SF_30Y"]
+    tenors = list(ticker_registry.output_columns().values())
 
     fig = go.Figure()
 
     for tenor in tenors:
         if tenor not in basis_df.columns:
             continue
-        label = tenor.replace("Treasury_SF_", "")
+        label = tenor.replace(f"{ticker_registry.OUTPUT_PREFIX}_", "")
         series = basis_df[tenor]
         if start_dt is not None and end_dt is not None:
             series = series.loc[start_dt:end_dt].dropna()
@@ -106,7 +118,11 @@ def plot_main(data_dir: Path = DATA_DIR) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
 
     file = data_dir / "ftsfr_treasury_sf_basis.parquet"
-    basis_df = load_treasury_sf_data(file)
+    basis_df = load_treasury_sf_data(
+        file,
+        series=list(ticker_registry.output_columns().values()),
+        start_date=DEFAULT_START_DATE,
+    )
 
     plot_figure(
         basis_df,
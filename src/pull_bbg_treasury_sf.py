@@ -5,23 +5,199 @@ This module pulls Treasury constant maturity yields and SOFR-based secured finan
 rates to calculate Treasury-SF basis spreads.
 """
 
+import argparse
+import os
+import shutil
 import sys
 from pathlib import Path
 
 sys.path.insert(0, "./src")
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 import chartbook
+import ticker_registry
+from bbg_cache import ResponseCache
+from bbg_sources import get_source
 
 BASE_DIR = chartbook.env.get_project_root()
 DATA_DIR = BASE_DIR / "_data"
+CACHE_DIR = DATA_DIR / "_bbg_cache"
+START_DATE = "2000-01-01"
 END_DATE = pd.Timestamp.today().strftime("%Y-%m-%d")
 
+# Business days re-requested before the last stored date in incremental mode,
+# so late revisions from Bloomberg overwrite previously stored values
+INCREMENTAL_OVERLAP_DAYS = 5
 
-def pull_treasury_sf_data(start_date="2000-01-01", end_date=END_DATE):
+# Default chunk size for chunked pulls (pandas offset alias, year starts)
+CHUNK_FREQ = "YS"
+
+# Name of the date column in the raw parquet files (from reset_index on bdh output)
+DATE_COL = "index"
+
+# Rows per parquet row group in the single-file raw layout (about one year of
+# daily data), so date-filtered reads can skip row groups using their statistics
+RAW_ROW_GROUP_SIZE = 256
+
+# Hive partition column for the partitioned raw layout ('<dataset>/year=YYYY/')
+PARTITION_COL = "year"
+
+# Tickers come from the shared registry in ticker_registry.py
+TREASURY_TICKERS = ticker_registry.treasury_tickers()
+SF_TICKERS = ticker_registry.sf_tickers()
+
+FIELDS = ["PX_LAST"]
+
+# Canonical long layout for raw datasets written by the Arrow ingestion path
+LONG_SCHEMA = pa.schema(
+    [
+        ("date", pa.date32()),
+        ("ticker", pa.dictionary(pa.int32(), pa.string())),
+        ("field", pa.dictionary(pa.int32(), pa.string())),
+        ("value", pa.float64()),
+    ]
+)
+
+# Raw dataset name -> tickers stored in it
+DATASETS = {
+    "treasury_yields": TREASURY_TICKERS,
+    "sf_rates": SF_TICKERS,
+}
+
+DATASET_LABELS = {
+    "treasury_yields": "Treasury yields",
+    "sf_rates": "secured financing (SOFR OIS) rates",
+}
+
+
+def process_bloomberg_df(df):
+    """Flatten multi-index (ticker, field) columns from xbbg into 'TICKER_FIELD'."""
+    if not df.empty and isinstance(df.columns, pd.MultiIndex):
+        df.columns = [f"{t[0]}_{t[1]}" for t in df.columns]
+        df.reset_index(inplace=True)
+    return df
+
+
+def _batches(tickers, batch_size=None):
+    """Split a ticker list into consecutive sub-batches of at most batch_size."""
+    if not batch_size:
+        return [list(tickers)]
+    return [list(tickers[i : i + batch_size]) for i in range(0, len(tickers), batch_size)]
+
+
+def _frame_from_series(series_by_key, tickers):
+    """Assemble per-(ticker, field) series into a bdh-shaped MultiIndex frame."""
+    columns = {
+        (ticker, field): series_by_key[(ticker, field)]
+        for ticker in tickers
+        for field in FIELDS
+        if not series_by_key[(ticker, field)].empty
+    }
+    if not columns:
+        return pd.DataFrame()
+    df = pd.DataFrame(columns).sort_index()
+    df.columns = pd.MultiIndex.from_tuples(df.columns)
+    return df
+
+
+def iter_bdh_responses(
+    start_date=START_DATE,
+    end_date=END_DATE,
+    batch_size=None,
+    source=None,
+    cache=None,
+    datasets=None,
+):
+    """
+    Yield (dataset name, bdh response) for every sub-batch request, in request order.
+
+    See ``pull_treasury_sf_data`` for the parameters. Responses are raw
+    bdh-shaped frames with (ticker, field) MultiIndex columns.
+    """
+    source = source or get_source()
+
+    # Respect the provider's per-request ticker limit
+    limit = getattr(source, "max_tickers_per_request", None)
+    if limit:
+        batch_size = min(batch_size, limit) if batch_size else limit
+
+    print(f">> Pulling Treasury-SF data from Bloomberg ({source.name})...")
+
+    requests = [
+        (name, batch)
+        for name, tickers in (datasets or DATASETS).items()
+        if tickers
+        for batch in _batches(tickers, batch_size)
+    ]
+
+    def fetch(request):
+        name, tickers = request
+        if cache is None:
+            print(f"   Pulling {DATASET_LABELS[name]} ({len(tickers)} tickers)...")
+            return source.bdh(
+                tickers=tickers,
+                flds=FIELDS,
+                start_date=start_date,
+                end_date=end_date,
+            )
+
+        series_by_key = {}
+        for ticker in tickers:
+            hits = {
+                field: cache.get(ticker, field, start_date, end_date, source.name)
+                for field in FIELDS
+            }
+            if all(hit is not None for hit in hits.values()):
+                series_by_key.update({(ticker, field): hit for field, hit in hits.items()})
+        missing = [t for t in tickers if (t, FIELDS[0]) not in series_by_key]
+
+        print(
+            f"   Pulling {DATASET_LABELS[name]} ({len(missing)} tickers, "
+            f"{len(tickers) - len(missing)} cached)..."
+        )
+        if missing:
+            df = source.bdh(
+                tickers=missing,
+                flds=FIELDS,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            for ticker in missing:
+                for field in FIELDS:
+                    if not df.empty and (ticker, field) in df.columns:
+                        series = df[(ticker, field)].dropna()
+                    else:
+                        series = pd.Series(dtype=float)
+                    cache.put(ticker, field, start_date, end_date, source.name, series)
+                    series_by_key[(ticker, field)] = series
+
+        return _frame_from_series(series_by_key, tickers)
+
+    for request in requests:
+        yield request[0], fetch(request)
+
+
+def pull_treasury_sf_data(
+    start_date=START_DATE,
+    end_date=END_DATE,
+    batch_size=None,
+    source=None,
+    cache=None,
+    datasets=None,
+):
     """
-    Fetch historical Treasury yields and SF rates from Bloomberg using xbbg.
+    Fetch historical Treasury yields and SF rates from Bloomberg.
+
+    Each dataset's ticker list is split into sub-batches of ``batch_size``
+    tickers, giving one ``bdh`` request per batch. Requests are sent one at
+    a time: xbbg drives a single shared Bloomberg session, which cannot
+    serve concurrent requests.
 
     Parameters
     ----------
@@ -29,6 +205,18 @@ def pull_treasury_sf_data(start_date="2000-01-01", end_date=END_DATE):
         Start date in 'YYYY-MM-DD' format
     end_date : str
         End date in 'YYYY-MM-DD' format
+    batch_size : int, optional
+        Maximum number of tickers per request. Defaults to one request per
+        dataset, capped at the source's ``max_tickers_per_request``.
+    source : object, optional
+        Data source with a ``bdh`` method (see ``bbg_sources``). Defaults to
+        the source selected by the ``BBG_SOURCE`` environment variable (xbbg).
+    cache : ResponseCache, optional
+        Raw-response cache checked before each request. Tickers found in the
+        cache for the same window and source are not requested again.
+    datasets : dict, optional
+        Mapping of dataset name to the tickers to request. Defaults to every
+        ticker in ``DATASETS``; a dataset with no tickers comes back empty.
 
     Returns
     -------
@@ -37,92 +225,584 @@ def pull_treasury_sf_data(start_date="2000-01-01", end_date=END_DATE):
         - 'treasury_yields': Treasury constant maturity yields
         - 'sf_rates': SOFR-based secured financing rates
     """
-    # import here to enhance compatibility with devices that don't support xbbg
-    from xbbg import blp
+    # Stitch sub-batches back together, aligning on date
+    frames = {name: [] for name in DATASETS}
+    for name, df in iter_bdh_responses(
+        start_date, end_date, batch_size, source, cache, datasets
+    ):
+        if not df.empty:
+            frames[name].append(df)
 
-    # Treasury yield tickers (constant maturity)
-    treasury_tickers = [
-        "USGG2YR Index",   # 2-Year Treasury
-        "USGG5YR Index",   # 5-Year Treasury
-        "USGG10YR Index",  # 10-Year Treasury
-        "USGG20YR Index",  # 20-Year Treasury
-        "USGG30YR Index",  # 30-Year Treasury
-    ]
+    data = {}
+    for name in DATASETS:
+        df = pd.concat(frames[name], axis=1).sort_index() if frames[name] else pd.DataFrame()
+        data[name] = process_bloomberg_df(df)
 
-    # SOFR-based secured financing rate tickers
-    # These are SOFR OIS swap rates at various tenors
-    sf_tickers = [
-        "USOSFR2 Curncy",   # 2-Year SOFR OIS
-        "USOSFR5 Curncy",   # 5-Year SOFR OIS
-        "USOSFR10 Curncy",  # 10-Year SOFR OIS
-        "USOSFR20 Curncy",  # 20-Year SOFR OIS
-        "USOSFR30 Curncy",  # 30-Year SOFR OIS
-    ]
+    return data
 
-    fields = ["PX_LAST"]
-
-    # Helper to flatten multi-index columns from xbbg
-    def process_bloomberg_df(df):
-        if not df.empty and isinstance(df.columns, pd.MultiIndex):
-            df.columns = [f"{t[0]}_{t[1]}" for t in df.columns]
-            df.reset_index(inplace=True)
-        return df
-
-    print(">> Pulling Treasury-SF data from Bloomberg...")
-
-    # Pull Treasury yields
-    print("   Pulling Treasury yields...")
-    treasury_df = process_bloomberg_df(
-        blp.bdh(
-            tickers=treasury_tickers,
-            flds=fields,
-            start_date=start_date,
-            end_date=end_date,
-        )
+
+def bdh_to_arrow(df):
+    """
+    Convert a bdh response straight into a long pyarrow Table.
+
+    The (dates x columns) value block is raveled column-major, so rows come
+    out grouped by (ticker, field) and sorted by date within each group.
+    Ticker and field are dictionary-encoded, and missing values are dropped
+    with a single mask over the flat array.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        bdh response with a date index and (ticker, field) MultiIndex columns
+
+    Returns
+    -------
+    pa.Table
+        Table with the ``LONG_SCHEMA`` columns (date, ticker, field, value)
+    """
+    if df.empty:
+        return LONG_SCHEMA.empty_table()
+
+    values = df.to_numpy(dtype="float64").ravel(order="F")
+    n_dates, n_cols = df.shape
+    mask = ~np.isnan(values)
+
+    dates = pd.to_datetime(df.index).to_numpy(dtype="datetime64[D]")
+    ticker_codes, tickers = pd.factorize(df.columns.get_level_values(0))
+    field_codes, fields = pd.factorize(df.columns.get_level_values(1))
+
+    date_idx = np.tile(np.arange(n_dates), n_cols)[mask]
+    col_idx = np.repeat(np.arange(n_cols), n_dates)[mask]
+
+    return pa.Table.from_arrays(
+        [
+            pa.array(dates[date_idx], type=pa.date32()),
+            pa.DictionaryArray.from_arrays(
+                pa.array(ticker_codes[col_idx], type=pa.int32()),
+                pa.array(tickers, type=pa.string()),
+            ),
+            pa.DictionaryArray.from_arrays(
+                pa.array(field_codes[col_idx], type=pa.int32()),
+                pa.array(fields, type=pa.string()),
+            ),
+            pa.array(values[mask], type=pa.float64()),
+        ],
+        schema=LONG_SCHEMA,
     )
 
-    # Pull SF rates
-    print("   Pulling secured financing (SOFR OIS) rates...")
-    sf_df = process_bloomberg_df(
-        blp.bdh(
-            tickers=sf_tickers,
-            flds=fields,
-            start_date=start_date,
-            end_date=end_date,
-        )
+
+def long_to_wide(table):
+    """Pivot a long (date, ticker, field, value) table to the wide raw layout."""
+    df = table.to_pandas()
+    columns = df["ticker"].astype(str) + "_" + df["field"].astype(str)
+    wide = (
+        df.assign(column=columns)
+        .pivot(index="date", columns="column", values="value")
+        .rename_axis(index=DATE_COL, columns=None)
     )
+    return wide.reset_index()
+
+
+def pull_treasury_sf_data_arrow(
+    start_date=START_DATE,
+    end_date=END_DATE,
+    data_dir=DATA_DIR,
+    **pull_kwargs,
+):
+    """
+    Pull Treasury yields and SF rates and stream them to long-format parquet.
+
+    Each bdh response is converted with ``bdh_to_arrow`` and written as its
+    own row group as soon as it arrives, so no wide pandas frame is built and
+    memory stays bounded by the largest single response.
+
+    Parameters
+    ----------
+    start_date : str
+        Start date in 'YYYY-MM-DD' format
+    end_date : str
+        End date in 'YYYY-MM-DD' format
+    data_dir : Path
+        Output directory for '<dataset>.parquet'
+    **pull_kwargs
+        Passed through to ``iter_bdh_responses`` (e.g. ``batch_size``, ``source``)
+    """
+    data_dir = Path(data_dir)
+    paths = {name: data_dir / f"{name}.parquet" for name in DATASETS}
+    tmp_paths = {name: path.with_name(path.name + ".tmp") for name, path in paths.items()}
+
+    writers = {name: pq.ParquetWriter(tmp_paths[name], LONG_SCHEMA) for name in DATASETS}
+    try:
+        for name, df in iter_bdh_responses(start_date, end_date, **pull_kwargs):
+            writers[name].write_table(bdh_to_arrow(df))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for name in DATASETS:
+        os.replace(tmp_paths[name], paths[name])
+        print(f">> Saved {paths[name].name} (long format)")
+
+
+def raw_path(name, data_dir=DATA_DIR):
+    """
+    Return where a raw dataset is stored.
+
+    This is the hive-partitioned directory '<data_dir>/<name>/' if it exists,
+    otherwise the single file '<data_dir>/<name>.parquet'.
+    """
+    data_dir = Path(data_dir)
+    partitioned = data_dir / name
+    return partitioned if partitioned.is_dir() else data_dir / f"{name}.parquet"
+
+
+def _date_scalar(value, arrow_type):
+    """Build a pyarrow scalar of the date column's type for use in filters."""
+    ts = pd.Timestamp(value)
+    if pa.types.is_date(arrow_type):
+        return pa.scalar(ts.date(), type=arrow_type)
+    return pa.scalar(ts.to_pydatetime()).cast(arrow_type)
 
-    return {
-        "treasury_yields": treasury_df,
-        "sf_rates": sf_df,
-    }
 
+def load_raw(name, data_dir=DATA_DIR, start_date=None, end_date=None):
+    """
+    Load a raw dataset in the wide layout, optionally restricted to a date window.
+
+    Date bounds are pushed down to pyarrow: on the partitioned layout they
+    prune 'year=YYYY' directories, and row filters skip row groups whose
+    statistics fall outside the window. Long-format files are pivoted back
+    to the wide layout.
 
-def load_treasury_yields(data_dir=DATA_DIR):
-    """Load Treasury yields from parquet file."""
-    path = data_dir / "treasury_yields.parquet"
-    return pd.read_parquet(path)
+    Parameters
+    ----------
+    name : str
+        Raw dataset name ('treasury_yields' or 'sf_rates')
+    data_dir : Path
+        Directory containing the raw datasets
+    start_date, end_date : str or date, optional
+        Inclusive date bounds
 
+    Returns
+    -------
+    pd.DataFrame
+        Wide raw dataset (date column plus 'TICKER_FIELD' columns)
+    """
+    path = raw_path(name, data_dir)
+    partitioned = path.is_dir()
+    dataset = ds.dataset(path, format="parquet", partitioning="hive" if partitioned else None)
+
+    date_col = "date" if "ticker" in dataset.schema.names else DATE_COL
+    date_type = dataset.schema.field(date_col).type
+
+    filters = []
+    if start_date is not None:
+        filters.append(pc.field(date_col) >= _date_scalar(start_date, date_type))
+        if partitioned:
+            filters.append(pc.field(PARTITION_COL) >= pd.Timestamp(start_date).year)
+    if end_date is not None:
+        filters.append(pc.field(date_col) <= _date_scalar(end_date, date_type))
+        if partitioned:
+            filters.append(pc.field(PARTITION_COL) <= pd.Timestamp(end_date).year)
+
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+
+    table = dataset.to_table(filter=expression)
+    if partitioned:
+        table = table.drop_columns([PARTITION_COL]).sort_by(date_col)
+
+    if date_col == "date":
+        return long_to_wide(table)
+    return table.to_pandas()
+
+
+def save_raw(df, name, data_dir=DATA_DIR, partitioned=False):
+    """
+    Save a wide raw dataset as a single parquet file or a hive-partitioned dataset.
+
+    The partitioned layout writes '<data_dir>/<name>/year=YYYY/*.parquet'.
+    Writing one layout removes any stored copy in the other, so loaders
+    never see stale data.
+    """
+    data_dir = Path(data_dir)
+    file_path = data_dir / f"{name}.parquet"
+    dir_path = data_dir / name
 
-def load_sf_rates(data_dir=DATA_DIR):
-    """Load SF rates from parquet file."""
-    path = data_dir / "sf_rates.parquet"
-    return pd.read_parquet(path)
+    if partitioned:
+        years = pd.to_datetime(df[DATE_COL]).dt.year.astype("int32")
+        table = pa.Table.from_pandas(df.assign(**{PARTITION_COL: years}), preserve_index=False)
 
+        tmp_dir = data_dir / f"{name}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        pq.write_to_dataset(table, tmp_dir, partition_cols=[PARTITION_COL])
+        shutil.rmtree(dir_path, ignore_errors=True)
+        os.replace(tmp_dir, dir_path)
+        file_path.unlink(missing_ok=True)
+        print(f">> Saved {name}/ ({PARTITION_COL}-partitioned)")
+    else:
+        df.to_parquet(file_path, row_group_size=RAW_ROW_GROUP_SIZE)
+        shutil.rmtree(dir_path, ignore_errors=True)
+        print(f">> Saved {file_path.name}")
 
-def main():
+
+def load_treasury_yields(data_dir=DATA_DIR, start_date=None, end_date=None):
+    """Load Treasury yields from parquet, optionally restricted to a date window."""
+    return load_raw("treasury_yields", data_dir, start_date=start_date, end_date=end_date)
+
+
+def load_sf_rates(data_dir=DATA_DIR, start_date=None, end_date=None):
+    """Load SF rates from parquet, optionally restricted to a date window."""
+    return load_raw("sf_rates", data_dir, start_date=start_date, end_date=end_date)
+
+
+def get_last_stored_dates(df, tickers, fields=FIELDS):
+    """
+    Find the last date with a non-null value for each ticker in a raw dataset.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw dataset as saved by ``main`` (date column plus 'TICKER_FIELD' columns)
+    tickers : list of str
+        Tickers to look up
+    fields : list of str
+        Bloomberg fields stored for each ticker
+
+    Returns
+    -------
+    dict
+        Mapping of ticker to its last stored date (earliest across fields),
+        or None if any field of the ticker has no stored observations
+    """
+    df = df.set_index(DATE_COL) if DATE_COL in df.columns else df
+
+    last_dates = {}
+    for ticker in tickers:
+        cols = [f"{ticker}_{field}" for field in fields]
+        lasts = [df[col].last_valid_index() if col in df.columns else None for col in cols]
+        last_dates[ticker] = None if any(last is None for last in lasts) else min(lasts)
+    return last_dates
+
+
+def merge_incremental(existing_df, new_df):
+    """
+    Merge a freshly pulled window into a stored raw dataset.
+
+    Values from ``new_df`` take precedence on overlapping dates, so revised
+    observations replace the stored ones.
+
+    Parameters
+    ----------
+    existing_df : pd.DataFrame
+        Previously stored raw dataset
+    new_df : pd.DataFrame
+        Newly pulled raw dataset covering the incremental window
+
+    Returns
+    -------
+    pd.DataFrame
+        Combined dataset sorted by date
+    """
+    if new_df.empty:
+        return existing_df
+    if existing_df.empty:
+        return new_df
+
+    existing = existing_df.set_index(DATE_COL)
+    new = new_df.set_index(DATE_COL)
+    columns = list(existing.columns) + [c for c in new.columns if c not in existing.columns]
+
+    merged = new.combine_first(existing)[columns].sort_index()
+    merged.index.name = DATE_COL
+    return merged.reset_index()
+
+
+def pull_treasury_sf_data_incremental(
+    data_dir=DATA_DIR,
+    end_date=END_DATE,
+    overlap_days=INCREMENTAL_OVERLAP_DAYS,
+    **pull_kwargs,
+):
+    """
+    Pull only the data missing from the stored raw datasets and merge it in.
+
+    Each ticker is re-requested from ``overlap_days`` business days before
+    its own high-water mark, or from ``START_DATE`` if it has no stored
+    observations (or its dataset is missing). Tickers sharing a start date
+    are pulled together, one request window per distinct start, so a single
+    stale or new ticker does not widen the window of all the others.
+
+    Parameters
+    ----------
+    data_dir : Path
+        Directory containing the stored raw datasets
+    end_date : str
+        End date in 'YYYY-MM-DD' format
+    overlap_days : int
+        Number of business days to re-request before the last stored date
+    **pull_kwargs
+        Passed through to ``pull_treasury_sf_data`` (e.g. ``batch_size``, ``source``)
+
+    Returns
+    -------
+    dict
+        Dictionary with the merged 'treasury_yields' and 'sf_rates' DataFrames
+    """
+    data_dir = Path(data_dir)
+
+    existing = {}
+    last_dates = {}
+    for name, tickers in DATASETS.items():
+        stored = raw_path(name, data_dir).exists()
+        existing[name] = load_raw(name, data_dir) if stored else pd.DataFrame()
+        if existing[name].empty:
+            last_dates.update({t: None for t in tickers})
+        else:
+            last_dates.update(get_last_stored_dates(existing[name], tickers))
+
+    # Group tickers by their own request start date
+    windows = {}
+    for name, tickers in DATASETS.items():
+        for ticker in tickers:
+            last = last_dates[ticker]
+            if last is None:
+                start_date = START_DATE
+            else:
+                start = pd.Timestamp(last) - pd.offsets.BDay(overlap_days)
+                start_date = max(start, pd.Timestamp(START_DATE)).strftime("%Y-%m-%d")
+            windows.setdefault(start_date, {n: [] for n in DATASETS})[name].append(ticker)
+
+    merged = dict(existing)
+    for start_date, datasets in sorted(windows.items()):
+        n_tickers = sum(len(tickers) for tickers in datasets.values())
+        print(f">> Incremental pull from {start_date} to {end_date} ({n_tickers} tickers)")
+        new = pull_treasury_sf_data(
+            start_date=start_date, end_date=end_date, datasets=datasets, **pull_kwargs
+        )
+        for name in DATASETS:
+            merged[name] = merge_incremental(merged[name], new[name])
+
+    return merged
+
+
+def date_chunks(start_date, end_date, freq=CHUNK_FREQ):
+    """
+    Split [start_date, end_date] into consecutive inclusive (start, end) chunks.
+
+    Chunk boundaries fall on the ``freq`` anchors (e.g. "YS" for 1 January,
+    "QS" for quarter starts), so chunk keys are stable across runs.
+    """
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    anchors = [a for a in pd.date_range(start, end, freq=freq) if a > start]
+    starts = [start, *anchors]
+    ends = [a - pd.Timedelta(days=1) for a in anchors] + [end]
+    return list(zip(starts, ends))
+
+
+def stitch_parquet_files(paths, output_path):
+    """
+    Concatenate parquet files into one, streaming one file at a time.
+
+    Columns missing from a file (e.g. tickers with no history in an early
+    chunk) are filled with nulls. Only schemas are read up front, so each
+    file's data is loaded exactly once. The output is written to a temporary
+    file and moved into place atomically.
+    """
+    schemas = [pq.read_schema(path) for path in paths]
+    fields = {}
+    for schema in schemas:
+        for field in schema:
+            if field.name not in fields and not pa.types.is_null(field.type):
+                fields[field.name] = field
+    target = pa.schema(list(fields.values()))
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with pq.ParquetWriter(tmp_path, target) as writer:
+        for path in paths:
+            table = pq.read_table(path)
+            if table.num_rows == 0:
+                continue
+            columns = [
+                table.column(f.name).cast(f.type)
+                if f.name in table.column_names
+                else pa.nulls(table.num_rows, f.type)
+                for f in target
+            ]
+            writer.write_table(
+                pa.Table.from_arrays(columns, schema=target),
+                row_group_size=RAW_ROW_GROUP_SIZE,
+            )
+    os.replace(tmp_path, output_path)
+
+
+def pull_treasury_sf_data_chunked(
+    start_date=START_DATE,
+    end_date=END_DATE,
+    chunk_freq=CHUNK_FREQ,
+    data_dir=DATA_DIR,
+    checkpoint_dir=None,
+    **pull_kwargs,
+):
+    """
+    Pull the full history chunk by chunk, checkpointing each finished chunk.
+
+    Each chunk is written to ``checkpoint_dir`` as soon as it is pulled.
+    On restart, chunks with an existing checkpoint are skipped, so a failed
+    pull resumes from the first unfinished chunk. Once every chunk is done,
+    the checkpoints are stitched into the final raw parquet files and removed.
+
+    Parameters
+    ----------
+    start_date : str
+        Start date in 'YYYY-MM-DD' format
+    end_date : str
+        End date in 'YYYY-MM-DD' format
+    chunk_freq : str
+        Pandas offset alias for chunk boundaries (e.g. "YS", "QS")
+    data_dir : Path
+        Directory for the final raw datasets
+    checkpoint_dir : Path, optional
+        Directory for chunk checkpoints. Defaults to ``data_dir / "_checkpoints"``.
+    **pull_kwargs
+        Passed through to ``pull_treasury_sf_data`` (e.g. ``batch_size``, ``source``)
+    """
+    data_dir = Path(data_dir)
+    checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else data_dir / "_checkpoints"
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    chunks = date_chunks(start_date, end_date, freq=chunk_freq)
+    checkpoints = {name: [] for name in DATASETS}
+
+    print(f">> Chunked pull: {len(chunks)} chunks from {start_date} to {end_date}")
+    for chunk_start, chunk_end in chunks:
+        tag = f"{chunk_start:%Y%m%d}_{chunk_end:%Y%m%d}"
+        paths = {name: checkpoint_dir / f"{name}_{tag}.parquet" for name in DATASETS}
+        for name, path in paths.items():
+            checkpoints[name].append(path)
+
+        if all(path.exists() for path in paths.values()):
+            print(f"   Chunk {tag} already checkpointed, skipping")
+            continue
+
+        data = pull_treasury_sf_data(
+            start_date=chunk_start.strftime("%Y-%m-%d"),
+            end_date=chunk_end.strftime("%Y-%m-%d"),
+            **pull_kwargs,
+        )
+        for name, path in paths.items():
+            tmp_path = path.with_name(path.name + ".tmp")
+            data[name].to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+    for name, paths in checkpoints.items():
+        stitch_parquet_files(paths, data_dir / f"{name}.parquet")
+        print(f">> Stitched {len(paths)} chunks into {name}.parquet")
+
+    for paths in checkpoints.values():
+        for path in paths:
+            path.unlink()
+
+
+def main(
+    incremental=False,
+    batch_size=None,
+    source=None,
+    chunk_freq=None,
+    use_cache=True,
+    raw_format="wide",
+    partitioned=False,
+):
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
     # Pull data from source
-    data = pull_treasury_sf_data()
+    pull_kwargs = {
+        "batch_size": batch_size,
+        "source": source,
+        "cache": ResponseCache(CACHE_DIR) if use_cache else None,
+    }
+    if raw_format == "long":
+        if incremental or chunk_freq or partitioned:
+            raise ValueError("Long raw format is only supported for full single-file pulls")
+        pull_treasury_sf_data_arrow(data_dir=DATA_DIR, **pull_kwargs)
+        return
+    if chunk_freq:
+        if partitioned:
+            raise ValueError("Chunked pulls write single-file raw datasets")
+        # Chunked pulls write the raw datasets themselves
+        pull_treasury_sf_data_chunked(chunk_freq=chunk_freq, data_dir=DATA_DIR, **pull_kwargs)
+        return
+    if incremental:
+        data = pull_treasury_sf_data_incremental(data_dir=DATA_DIR, **pull_kwargs)
+    else:
+        data = pull_treasury_sf_data(**pull_kwargs)
 
     # Save each dataset to parquet
-    data["treasury_yields"].to_parquet(DATA_DIR / "treasury_yields.parquet")
-    print(f">> Saved treasury_yields.parquet")
-
-    data["sf_rates"].to_parquet(DATA_DIR / "sf_rates.parquet")
-    print(f">> Saved sf_rates.parquet")
+    for name in DATASETS:
+        save_raw(data[name], name, data_dir=DATA_DIR, partitioned=partitioned)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only pull dates after the last stored observation and merge them in",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Maximum number of tickers per Bloomberg request",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["xbbg", "replay"],
+        default=None,
+        help="Data source (defaults to the BBG_SOURCE environment variable, then xbbg)",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=None,
+        help="Seconds of simulated latency per request for the replay source",
+    )
+    parser.add_argument(
+        "--chunked",
+        nargs="?",
+        const=CHUNK_FREQ,
+        default=None,
+        metavar="FREQ",
+        help="Pull the full history in resumable chunks (pandas offset alias, default YS)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk raw-response cache",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["wide", "long"],
+        default="wide",
+        help="Raw storage layout: wide ticker columns or long (date, ticker, field, value)",
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="Store raw datasets as year-partitioned (hive) parquet directories",
+    )
+    args = parser.parse_args()
+
+    source_kwargs = {}
+    if args.replay_latency is not None:
+        source_kwargs["latency"] = args.replay_latency
+    main(
+        incremental=args.incremental,
+        batch_size=args.batch_size,
+        source=get_source(args.source, **source_kwargs),
+        chunk_freq=args.chunked,
+        use_cache=not args.no_cache,
+        raw_format=args.format,
+        partitioned=args.partitioned,
+    )
@@ -9,15 +9,20 @@ Treasury-SF basis measuring the spread between Treasury yields and SOFR-based se
 import sys
 sys.path.insert(0, "./src")
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+import basis_storage
 import chartbook
+import ticker_registry
 
 BASE_DIR = chartbook.env.get_project_root()
 DATA_DIR = BASE_DIR / "_data"
 
+# Series to load, e.g. ["Treasury_SF_2Y", "Treasury_SF_10Y"]; None loads all.
+# Only these series are read from disk.
+SERIES = None
+
 # %%
 """
 ## Methodology
@@ -48,7 +53,7 @@ Results are expressed in basis points.
 """
 
 # %%
-df = pd.read_parquet(DATA_DIR / "ftsfr_treasury_sf_basis.parquet")
+df = basis_storage.read_ftsfr(DATA_DIR / "ftsfr_treasury_sf_basis.parquet", series=SERIES)
 print(f"Shape: {df.shape}")
 print(f"Columns: {df.columns.tolist()}")
 print(f"\nDate range: {df['ds'].min()} to {df['ds'].max()}")
@@ -65,7 +70,7 @@ for series in sorted(df['unique_id'].unique()):
 """
 
 # %%
-basis_wide = df.pivot(index='ds', columns='unique_id', values='y')
+basis_wide = df.astype({'unique_id': str}).pivot(index='ds', columns='unique_id', values='y')
 basis_stats = basis_wide.describe().T
 basis_stats['skewness'] = basis_wide.skew()
 basis_stats['kurtosis'] = basis_wide.kurtosis()
@@ -102,10 +107,13 @@ plt.show()
 # Plot most recent term structure
 fig, ax = plt.subplots(figsize=(10, 6))
 
-# Get most recent values
+# Get most recent values of the loaded tenors, in registry order
 latest = basis_wide.iloc[-1]
-tenors = [2, 5, 10, 20, 30]
-values = [latest.get(f'Treasury_SF_{t}Y', None) for t in tenors]
+years = ticker_registry.tenor_years()
+columns = ticker_registry.output_columns()
+loaded = [tenor for tenor in ticker_registry.tenors() if columns[tenor] in latest.index]
+tenors = [years[tenor] for tenor in loaded]
+values = [latest[columns[tenor]] for tenor in loaded]
 
 ax.plot(tenors, values, 'o-', linewidth=2, markersize=8)
 ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
@@ -0,0 +1,34 @@
+"""Tests functions in build_treasury_sf_basis.py"""
+
+import pandas as pd
+
+import basis_storage
+from build_treasury_sf_basis import build_treasury_sf_basis
+from calc_treasury_sf_basis import (
+    calculate_treasury_sf_basis,
+    calculate_treasury_sf_basis_curve,
+    load_treasury_sf_basis,
+)
+from create_ftsfr_datasets import wide_to_long
+from test_calc_treasury_sf_basis import save_replay_raw
+
+
+def test_fused_build_matches_separate_stages(tmp_path):
+    """Single-pass build writes the same outputs as the calc and format stages"""
+    save_replay_raw(tmp_path)
+
+    df_long = build_treasury_sf_basis(data_dir=tmp_path)
+
+    pd.testing.assert_frame_equal(
+        load_treasury_sf_basis(data_dir=tmp_path),
+        calculate_treasury_sf_basis(data_dir=tmp_path, with_staleness=True),
+    )
+    pd.testing.assert_frame_equal(
+        basis_storage.read_parquet(tmp_path / "treasury_sf_basis_curve.parquet"),
+        calculate_treasury_sf_basis_curve(data_dir=tmp_path),
+    )
+    expected = wide_to_long(calculate_treasury_sf_basis(data_dir=tmp_path))
+    pd.testing.assert_frame_equal(df_long, expected)
+    pd.testing.assert_frame_equal(
+        basis_storage.read_ftsfr(tmp_path / "ftsfr_treasury_sf_basis.parquet"), expected
+    )
@@ -0,0 +1,270 @@
+"""Tests functions in calc_treasury_sf_basis.py"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import pyarrow.parquet as pq
+
+import basis_storage
+import ticker_registry
+from bbg_sources import ReplaySource
+from calc_treasury_sf_basis import (
+    OUTPUT_COLUMNS,
+    asof_join_on_index,
+    calculate_treasury_sf_basis,
+    calculate_treasury_sf_basis_asof,
+    compute_treasury_sf_basis,
+    compute_treasury_sf_basis_curve,
+    ffill_with_staleness,
+    load_treasury_sf_basis,
+    prepare_data,
+    resolve_columns,
+    save_treasury_sf_basis,
+    stream_treasury_sf_basis,
+    update_treasury_sf_basis,
+)
+from pull_bbg_treasury_sf import (
+    DATE_COL,
+    load_sf_rates,
+    pull_treasury_sf_data,
+    pull_treasury_sf_data_arrow,
+    save_raw,
+)
+
+
+def make_merged(start="2022-01-01", end="2023-12-31"):
+    """Prepared Treasury/SF frame built from the offline replay source"""
+    data = pull_treasury_sf_data(start, end, source=ReplaySource())
+    return prepare_data(data["treasury_yields"], data["sf_rates"])
+
+
+def test_compute_basis_matches_per_tenor_formula():
+    """Vectorized kernel gives (Treasury - SF) * 100 for every tenor"""
+    df_merged = make_merged()
+    basis = compute_treasury_sf_basis(df_merged)
+
+    assert list(basis.columns) == list(OUTPUT_COLUMNS.values())
+    for tenor, col in OUTPUT_COLUMNS.items():
+        expected = (df_merged[f"{tenor}_Treasury"] - df_merged[f"{tenor}_SF"]) * 100
+        np.testing.assert_allclose(basis[col].to_numpy(), expected.to_numpy())
+
+
+def test_compute_basis_does_not_mutate_input():
+    """The kernel returns a new frame and leaves its input untouched"""
+    df_merged = make_merged()
+    before = df_merged.copy()
+
+    compute_treasury_sf_basis(df_merged)
+
+    pd.testing.assert_frame_equal(df_merged, before)
+
+
+def save_replay_raw(data_dir, start="2022-01-01", end="2023-12-31", cutoff=None):
+    """Write replay raw datasets to data_dir, optionally truncated at cutoff"""
+    data = pull_treasury_sf_data(start, end, source=ReplaySource())
+    for name, df in data.items():
+        if cutoff is not None:
+            df = df[pd.to_datetime(df[DATE_COL]) <= cutoff]
+        save_raw(df, name, data_dir=data_dir)
+
+
+def test_incremental_update_matches_full(tmp_path):
+    """Updating with new dates gives the same output as a full recomputation"""
+    save_replay_raw(tmp_path, cutoff="2023-11-30")
+    update_treasury_sf_basis(data_dir=tmp_path)
+
+    save_replay_raw(tmp_path)
+    new_dates = update_treasury_sf_basis(data_dir=tmp_path)
+
+    assert new_dates == len(pd.bdate_range("2023-12-01", "2023-12-31"))
+    pd.testing.assert_frame_equal(
+        load_treasury_sf_basis(data_dir=tmp_path),
+        calculate_treasury_sf_basis(data_dir=tmp_path, with_staleness=True),
+    )
+
+
+def test_incremental_update_picks_up_revisions(tmp_path):
+    """Raw revisions inside the overlap window replace the stored basis"""
+    save_replay_raw(tmp_path, cutoff="2023-11-30")
+    update_treasury_sf_basis(data_dir=tmp_path)
+    before = load_treasury_sf_basis(data_dir=tmp_path)
+
+    save_replay_raw(tmp_path)
+    sf_df = load_sf_rates(data_dir=tmp_path)
+    revised = pd.to_datetime(sf_df[DATE_COL]).between("2023-11-28", "2023-11-30")
+    sf_df.loc[revised, sf_df.columns[1:]] += 0.25
+    save_raw(sf_df, "sf_rates", data_dir=tmp_path)
+    update_treasury_sf_basis(data_dir=tmp_path)
+
+    after = load_treasury_sf_basis(data_dir=tmp_path)
+    pd.testing.assert_frame_equal(
+        after, calculate_treasury_sf_basis(data_dir=tmp_path, with_staleness=True)
+    )
+    # The last three stored dates were revised, earlier rows are unchanged
+    assert (after.loc[before.index[-3:]] != before.iloc[-3:]).any(axis=None)
+    pd.testing.assert_frame_equal(after.loc[before.index[:-3]], before.iloc[:-3])
+
+
+def test_streaming_matches_full(tmp_path):
+    """Small record batches with carried fill state reproduce the in-memory result"""
+    save_replay_raw(tmp_path)
+    output_path = tmp_path / "streamed.parquet"
+
+    stream_treasury_sf_basis(data_dir=tmp_path, output_path=output_path, batch_size=37)
+
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(output_path),
+        calculate_treasury_sf_basis(data_dir=tmp_path, with_staleness=True),
+    )
+
+
+def test_asof_snapshots_match_individual_calls(tmp_path):
+    """Each as-of snapshot equals a separate call with that end_date"""
+    save_replay_raw(tmp_path)
+    as_of_dates = ["2022-03-15", "2023-01-01", "2022-07-04", "2023-12-31"]
+
+    snapshots = calculate_treasury_sf_basis_asof(as_of_dates, data_dir=tmp_path)
+
+    assert list(snapshots) == as_of_dates
+    for as_of, snapshot in snapshots.items():
+        expected = calculate_treasury_sf_basis(end_date=as_of, data_dir=tmp_path)
+        pd.testing.assert_frame_equal(snapshot, expected)
+
+
+def test_ffill_gap_limit_and_staleness():
+    """Values are carried at most max_fill_gap business days, with staleness counted"""
+    dates = pd.bdate_range("2024-01-01", periods=8)
+    basis_df = pd.DataFrame(
+        {"Treasury_SF_2Y": [1.0, np.nan, np.nan, np.nan, 5.0, np.nan, np.nan, np.nan]},
+        index=dates,
+    )
+
+    filled, staleness, _ = ffill_with_staleness(basis_df, max_fill_gap=2)
+
+    np.testing.assert_array_equal(
+        filled["Treasury_SF_2Y"].to_numpy(),
+        [1.0, 1.0, 1.0, np.nan, 5.0, 5.0, 5.0, np.nan],
+    )
+    np.testing.assert_array_equal(
+        staleness["Treasury_SF_2Y_days_stale"].to_numpy(),
+        [0, 1, 2, 3, 0, 1, 2, 3],
+    )
+
+
+def test_resolve_columns_reports_unknown():
+    """Registered tickers are mapped to tenors and unknown columns are reported"""
+    columns = ("USGG2YR Index_PX_LAST", "USGG99YR Index_PX_LAST")
+
+    with pytest.warns(UserWarning, match="USGG99YR"):
+        resolved = resolve_columns(columns, "Treasury")
+
+    assert resolved == ("2Y_Treasury", "USGG99YR Index_PX_LAST")
+
+
+@pytest.mark.parametrize("tolerance", [None, "30s"])
+def test_asof_join_matches_merge_asof(tolerance):
+    """Vectorized as-of join agrees with pd.merge_asof on asynchronous snaps"""
+    rng = np.random.default_rng(0)
+    open_ = pd.Timestamp("2024-01-02 09:00")
+
+    def snaps(n, columns):
+        offsets = np.sort(rng.integers(0, 6 * 3600, n))
+        index = pd.DatetimeIndex(open_ + pd.to_timedelta(offsets, unit="s"))
+        return pd.DataFrame(rng.normal(size=(n, len(columns))), index=index, columns=columns)
+
+    left = snaps(500, ["2Y_Treasury", "10Y_Treasury"])
+    right = snaps(300, ["2Y_SF", "10Y_SF"])
+
+    expected = pd.merge_asof(
+        left,
+        right,
+        left_index=True,
+        right_index=True,
+        tolerance=None if tolerance is None else pd.Timedelta(tolerance),
+    )
+    pd.testing.assert_frame_equal(asof_join_on_index(left, right, tolerance), expected)
+
+
+@pytest.mark.parametrize("layout", ["wide", "partitioned", "long"])
+def test_polars_backend_matches_pandas(tmp_path, layout):
+    """Lazy Polars query plan gives the same output as the pandas path"""
+    pytest.importorskip("polars")
+
+    if layout == "long":
+        pull_treasury_sf_data_arrow("2022-01-01", "2023-12-31", data_dir=tmp_path, source=ReplaySource())
+    else:
+        # Knock out runs of quotes so the gap-limited fill has work to do
+        data = pull_treasury_sf_data("2022-01-01", "2023-12-31", source=ReplaySource())
+        for name, df in data.items():
+            df.iloc[40:50, 1] = np.nan
+            df.iloc[100:103, 2:] = np.nan
+            save_raw(df, name, data_dir=tmp_path, partitioned=layout == "partitioned")
+
+    kwargs = dict(
+        data_dir=tmp_path,
+        start_date="2022-02-01",
+        end_date="2023-10-31",
+        max_fill_gap=3,
+        with_staleness=True,
+    )
+    pd.testing.assert_frame_equal(
+        calculate_treasury_sf_basis(backend="polars", **kwargs),
+        calculate_treasury_sf_basis(backend="pandas", **kwargs),
+    )
+
+
+@pytest.mark.parametrize("compact, tolerance", [("float32", 1e-4), ("int32", 0.005 + 1e-9)])
+def test_compact_storage_widens_within_bound(tmp_path, compact, tolerance):
+    """Compact outputs load back as float64 within the documented precision bound"""
+    save_replay_raw(tmp_path, cutoff="2023-11-30")
+    path = tmp_path / "treasury_sf_basis.parquet"
+    save_treasury_sf_basis(calculate_treasury_sf_basis(data_dir=tmp_path, with_staleness=True), path, compact)
+
+    # Incremental updates keep the stored mode
+    save_replay_raw(tmp_path)
+    update_treasury_sf_basis(data_dir=tmp_path)
+    assert basis_storage.storage_mode(pq.read_schema(path)) == compact
+
+    loaded = load_treasury_sf_basis(data_dir=tmp_path)
+    expected = calculate_treasury_sf_basis(data_dir=tmp_path, with_staleness=True)
+    pd.testing.assert_frame_equal(loaded, expected, check_exact=False, rtol=0, atol=tolerance)
+
+
+def test_basis_curve_hits_quoted_tenors_without_overshoot():
+    """Dense curve passes through the quoted tenors and stays within neighbouring quotes"""
+    df_merged = make_merged()
+    df_merged.iloc[::7, df_merged.columns.get_loc("10Y_SF")] = np.nan
+    basis = compute_treasury_sf_basis(df_merged)
+
+    curve = compute_treasury_sf_basis_curve(df_merged, curve_years=range(1, 31))
+
+    assert curve.shape == (len(basis), 30)
+    for col in basis.columns:
+        pd.testing.assert_series_equal(
+            curve[col][basis[col].notna()], basis[col].dropna(), check_names=False
+        )
+    # Monotone (PCHIP) pieces never leave the range of the two bracketing quotes
+    low = basis[["Treasury_SF_10Y", "Treasury_SF_20Y"]].min(axis=1)
+    high = basis[["Treasury_SF_10Y", "Treasury_SF_20Y"]].max(axis=1)
+    inside = curve[[f"Treasury_SF_{year}Y" for year in range(11, 20)]]
+    quoted = basis["Treasury_SF_10Y"].notna()
+    assert inside[quoted].ge(low[quoted] - 1e-9, axis=0).all().all()
+    assert inside[quoted].le(high[quoted] + 1e-9, axis=0).all().all()
+    # 1Y is below the shortest quoted tenor and is not extrapolated
+    assert curve["Treasury_SF_1Y"].isna().all()
+    # Gaps between quoted tenors are still interpolated
+    assert curve.loc[~quoted, "Treasury_SF_7Y"].notna().all()
+
+
+def test_basis_curve_fractional_maturities(monkeypatch):
+    """Fractional tenors give a whole-year default grid and month labels"""
+    bill = {"tenor": "3M", "years": 0.25, "treasury": "USGG3M Index", "sf": "USOSFRC Curncy"}
+    monkeypatch.setattr(ticker_registry, "SERIES", [bill, *ticker_registry.SERIES])
+    assert ticker_registry.curve_years() == list(range(1, 31))
+    monkeypatch.undo()
+
+    curve = compute_treasury_sf_basis_curve(make_merged(), curve_years=[0.5, 2, 2.5])
+
+    assert list(curve.columns) == ["Treasury_SF_6M", "Treasury_SF_2Y", "Treasury_SF_2.5Y"]
+    assert curve["Treasury_SF_6M"].isna().all()
+    assert curve["Treasury_SF_2.5Y"].notna().all()
@@ -0,0 +1,206 @@
+"""Tests functions in create_ftsfr_datasets.py"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import basis_storage
+from bbg_sources import ReplaySource
+from calc_treasury_sf_basis import (
+    calculate_treasury_sf_basis,
+    load_treasury_sf_basis,
+    save_treasury_sf_basis,
+    update_treasury_sf_basis,
+)
+from create_ftsfr_datasets import save_ftsfr, update_ftsfr, wide_to_long, write_ftsfr_parquet
+from pull_bbg_treasury_sf import (
+    DATE_COL,
+    SF_TICKERS,
+    load_sf_rates,
+    pull_treasury_sf_data,
+    save_raw,
+)
+from test_calc_treasury_sf_basis import save_replay_raw
+
+
+def make_wide(n_dates=200, seed=0):
+    """Date-indexed wide basis frame with scattered missing values"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n_dates)
+    columns = ["Treasury_SF_2Y", "Treasury_SF_10Y", "Treasury_SF_5Y"]
+    values = rng.normal(size=(len(dates), len(columns)))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return pd.DataFrame(values, index=pd.Index(dates.date, name="index"), columns=columns)
+
+
+def test_wide_to_long_matches_stack_and_sort():
+    """Ravel-based reshape equals the stack/dropna/sort_values reshape"""
+    df_wide = make_wide()
+
+    expected = df_wide.stack().reset_index()
+    expected.columns = ["ds", "unique_id", "y"]
+    expected = expected[["unique_id", "ds", "y"]]
+    expected["ds"] = pd.to_datetime(expected["ds"])
+    expected = expected.dropna().sort_values(by=["unique_id", "ds"]).reset_index(drop=True)
+
+    expected["unique_id"] = expected["unique_id"].astype(pd.CategoricalDtype(sorted(df_wide.columns)))
+
+    pd.testing.assert_frame_equal(wide_to_long(df_wide), expected)
+
+
+def test_ftsfr_parquet_layout(tmp_path):
+    """One sorted, zstd row group per series with a dictionary unique_id"""
+    df_long = wide_to_long(make_wide())
+    path = tmp_path / "ftsfr.parquet"
+
+    write_ftsfr_parquet(df_long, path)
+
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_row_groups == df_long["unique_id"].nunique()
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        assert [c.column_index for c in row_group.sorting_columns] == [0, 1]
+        stats = row_group.column(0).statistics
+        assert stats.has_min_max and stats.min == stats.max
+        assert row_group.column(2).compression == "ZSTD"
+
+    assert pa.types.is_dictionary(pq.read_schema(path).field("unique_id").type)
+    pd.testing.assert_frame_equal(pd.read_parquet(path), df_long)
+
+
+def test_partitioned_layout_reads_requested_series(tmp_path):
+    """Series-partitioned output has a manifest and reads like the single file"""
+    df_long = wide_to_long(make_wide())
+    request = dict(series=["Treasury_SF_5Y", "Treasury_SF_2Y"], start_date="2020-03-01")
+
+    file_path = save_ftsfr(df_long, tmp_path)
+    expected = basis_storage.read_ftsfr(file_path, **request)
+
+    dir_path = save_ftsfr(df_long, tmp_path, partitioned=True)
+    assert not file_path.exists()
+
+    manifest = basis_storage.read_manifest(dir_path)
+    counts = df_long["unique_id"].value_counts()
+    assert {name: entry["rows"] for name, entry in manifest["series"].items()} == counts.to_dict()
+
+    # Readers pass the usual file path; the partitioned directory is picked up
+    result = basis_storage.read_ftsfr(file_path, **request)
+    assert list(result["unique_id"].cat.categories) == ["Treasury_SF_2Y", "Treasury_SF_5Y"]
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_incremental_update_requires_partitioned_layout(tmp_path):
+    """An incremental update refuses to run on the single-file layout"""
+    save_replay_raw(tmp_path)
+    file_path = save_ftsfr(wide_to_long(calculate_treasury_sf_basis(data_dir=tmp_path)), tmp_path)
+
+    with pytest.raises(FileNotFoundError, match="--partitioned"):
+        update_ftsfr(data_dir=tmp_path)
+    assert file_path.exists()
+
+
+def test_incremental_update_writes_fragments(tmp_path):
+    """New dates and revised overlap rows read back the same as a full rebuild"""
+    save_replay_raw(tmp_path, cutoff="2023-11-30")
+    update_treasury_sf_basis(data_dir=tmp_path)
+    save_ftsfr(
+        wide_to_long(calculate_treasury_sf_basis(data_dir=tmp_path)),
+        tmp_path,
+        compact="int32",
+        partitioned=True,
+    )
+    directory = tmp_path / "ftsfr_treasury_sf_basis"
+    before = {path.name: path.stat().st_mtime_ns for path in directory.glob("*.parquet")}
+
+    # New December dates, plus revised SF quotes at the end of November
+    save_replay_raw(tmp_path)
+    sf_df = load_sf_rates(data_dir=tmp_path)
+    revised = pd.to_datetime(sf_df[DATE_COL]).between("2023-11-28", "2023-11-30")
+    sf_df.loc[revised, sf_df.columns[1:]] += 0.25
+    save_raw(sf_df, "sf_rates", data_dir=tmp_path)
+    update_treasury_sf_basis(data_dir=tmp_path)
+    written = update_ftsfr(data_dir=tmp_path)
+
+    # Existing files are untouched; each series gained one fragment
+    assert {path: directory.joinpath(path).stat().st_mtime_ns for path in before} == before
+    manifest = basis_storage.read_manifest(directory)
+    assert all(len(entry["files"]) == 2 for entry in manifest["series"].values())
+    assert written == 5 * len(pd.bdate_range("2023-11-23", "2023-12-31"))
+
+    expected = wide_to_long(calculate_treasury_sf_basis(data_dir=tmp_path))
+    result = basis_storage.read_ftsfr(directory)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=0, atol=0.005 + 1e-9)
+    assert {name: entry["rows"] for name, entry in manifest["series"].items()} == (
+        expected["unique_id"].value_counts().to_dict()
+    )
+
+    # A fragment inside the next update's window is dropped from the manifest,
+    # and its file is deleted by the update after that
+    update_ftsfr(data_dir=tmp_path)
+    manifest = basis_storage.read_manifest(directory)
+    latest = [entry["files"][-1]["path"] for entry in manifest["series"].values()]
+    update_ftsfr(data_dir=tmp_path)
+    assert all(directory.joinpath(path).exists() for path in latest)
+    update_ftsfr(data_dir=tmp_path)
+    assert not any(directory.joinpath(path).exists() for path in latest)
+    pd.testing.assert_frame_equal(
+        basis_storage.read_ftsfr(directory), result, check_exact=False, rtol=0, atol=1e-9
+    )
+
+
+def test_incremental_update_windows_per_series(tmp_path):
+    """A series that stopped updating is rewritten from its own window only"""
+    data = pull_treasury_sf_data("2023-01-01", "2023-12-31", source=ReplaySource())
+    dates = pd.to_datetime(data["sf_rates"][DATE_COL])
+    data["sf_rates"].loc[dates > "2023-06-30", f"{SF_TICKERS[0]}_PX_LAST"] = np.nan
+
+    def save_data(cutoff="2023-12-31"):
+        for name, df in data.items():
+            save_raw(df[pd.to_datetime(df[DATE_COL]) <= cutoff], name, data_dir=tmp_path)
+
+    save_data(cutoff="2023-11-30")
+    update_treasury_sf_basis(data_dir=tmp_path, max_fill_gap=5)
+    save_ftsfr(
+        wide_to_long(calculate_treasury_sf_basis(data_dir=tmp_path, max_fill_gap=5)),
+        tmp_path,
+        partitioned=True,
+    )
+
+    save_data()
+    update_treasury_sf_basis(data_dir=tmp_path, max_fill_gap=5)
+    written = update_ftsfr(data_dir=tmp_path)
+
+    # The 2Y basis is filled through 2023-07-07, so its window starts on 2023-06-30
+    directory = tmp_path / "ftsfr_treasury_sf_basis"
+    manifest = basis_storage.read_manifest(directory)
+    assert manifest["series"]["Treasury_SF_2Y"]["files"][-1]["start"] == "2023-06-30"
+    assert written == len(pd.bdate_range("2023-06-30", "2023-07-07")) + 4 * len(
+        pd.bdate_range("2023-11-23", "2023-12-31")
+    )
+    pd.testing.assert_frame_equal(
+        basis_storage.read_ftsfr(directory),
+        wide_to_long(calculate_treasury_sf_basis(data_dir=tmp_path, max_fill_gap=5)),
+    )
+
+
+def test_incremental_update_rebuilds_on_new_series(tmp_path):
+    """A series added to the basis output triggers a full rebuild that includes it"""
+    save_replay_raw(tmp_path)
+    update_treasury_sf_basis(data_dir=tmp_path)
+    save_ftsfr(wide_to_long(calculate_treasury_sf_basis(data_dir=tmp_path)), tmp_path, partitioned=True)
+
+    basis_df = load_treasury_sf_basis(data_dir=tmp_path)
+    basis_df["Treasury_SF_7Y"] = basis_df["Treasury_SF_5Y"] + 1.0
+    basis_df["Treasury_SF_7Y_days_stale"] = basis_df["Treasury_SF_5Y_days_stale"]
+    save_treasury_sf_basis(basis_df, tmp_path / "treasury_sf_basis.parquet")
+
+    update_ftsfr(data_dir=tmp_path)
+
+    directory = tmp_path / "ftsfr_treasury_sf_basis"
+    assert "Treasury_SF_7Y" in basis_storage.read_manifest(directory)["series"]
+    basis_cols = [col for col in basis_df.columns if not col.endswith("_days_stale")]
+    pd.testing.assert_frame_equal(
+        basis_storage.read_ftsfr(directory), wide_to_long(basis_df[basis_cols])
+    )
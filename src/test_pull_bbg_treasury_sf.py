@@ -0,0 +1,194 @@
+"""Tests functions in pull_bbg_treasury_sf.py using the offline replay source"""
+
+import pandas as pd
+import pytest
+
+from bbg_cache import ResponseCache
+from bbg_sources import ReplaySource, record_fixtures
+from pull_bbg_treasury_sf import (
+    DATE_COL,
+    SF_TICKERS,
+    TREASURY_TICKERS,
+    load_sf_rates,
+    load_treasury_yields,
+    merge_incremental,
+    pull_treasury_sf_data,
+    pull_treasury_sf_data_arrow,
+    pull_treasury_sf_data_chunked,
+    pull_treasury_sf_data_incremental,
+    save_raw,
+)
+
+
+def test_pull_replay_shape():
+    """Replay pull returns one flattened column per ticker plus the date column"""
+    data = pull_treasury_sf_data("2024-01-01", "2024-03-31", source=ReplaySource())
+
+    for name, tickers in [("treasury_yields", TREASURY_TICKERS), ("sf_rates", SF_TICKERS)]:
+        df = data[name]
+        assert df.columns[0] == DATE_COL
+        assert list(df.columns[1:]) == [f"{t}_PX_LAST" for t in tickers]
+        assert len(df) == len(pd.bdate_range("2024-01-01", "2024-03-31"))
+
+
+def test_sub_batched_pull_matches_single_request():
+    """Sub-batched requests stitch back into the same frames as one request per dataset"""
+    source = ReplaySource()
+    single = pull_treasury_sf_data("2024-01-01", "2024-03-31", source=source)
+    batched = pull_treasury_sf_data("2024-01-01", "2024-03-31", batch_size=2, source=source)
+
+    for name in single:
+        pd.testing.assert_frame_equal(single[name], batched[name])
+
+
+def test_incremental_merge_matches_full_pull():
+    """Merging an overlapping recent window reproduces the full history"""
+    source = ReplaySource()
+    full = pull_treasury_sf_data("2024-01-01", "2024-03-31", source=source)
+    head = pull_treasury_sf_data("2024-01-01", "2024-02-29", source=source)
+    tail = pull_treasury_sf_data("2024-02-20", "2024-03-31", source=source)
+
+    for name in full:
+        merged = merge_incremental(head[name], tail[name])
+        pd.testing.assert_frame_equal(merged, full[name])
+
+
+def test_incremental_windows_per_ticker(tmp_path):
+    """A stale ticker is re-requested alone, without widening the other tickers' window"""
+
+    class RecordingSource(ReplaySource):
+        def __init__(self):
+            super().__init__()
+            self.requests = []
+
+        def bdh(self, tickers, flds, start_date, end_date):
+            self.requests.append((start_date, sorted(tickers)))
+            return super().bdh(tickers, flds, start_date, end_date)
+
+    full = pull_treasury_sf_data("2024-01-01", "2024-03-29", source=ReplaySource())
+    stale = f"{SF_TICKERS[0]}_PX_LAST"
+    for name, df in full.items():
+        dates = pd.to_datetime(df[DATE_COL])
+        stored = df[dates <= "2024-03-15"].copy()
+        if stale in stored.columns:
+            stored.loc[dates > "2024-01-31", stale] = float("nan")
+        save_raw(stored, name, data_dir=tmp_path)
+
+    source = RecordingSource()
+    merged = pull_treasury_sf_data_incremental(
+        data_dir=tmp_path, end_date="2024-03-29", overlap_days=5, source=source
+    )
+
+    others = sorted(t for t in TREASURY_TICKERS + SF_TICKERS if t != SF_TICKERS[0])
+    requested = sorted((start, t) for start, tickers in source.requests for t in tickers)
+    assert requested == sorted(
+        [("2024-01-24", SF_TICKERS[0])] + [("2024-03-08", t) for t in others]
+    )
+    for name in full:
+        pd.testing.assert_frame_equal(merged[name], full[name])
+
+
+def test_replay_fixtures(tmp_path):
+    """Recorded fixtures are replayed in place of synthetic data"""
+    tickers = TREASURY_TICKERS[:2]
+    record_fixtures(ReplaySource(seed=1), tickers, ["PX_LAST"], "2024-01-01", "2024-01-31", tmp_path)
+
+    replayed = ReplaySource(fixture_dir=tmp_path).bdh(tickers, ["PX_LAST"], "2024-01-01", "2024-01-31")
+    expected = ReplaySource(seed=1).bdh(tickers, ["PX_LAST"], "2024-01-01", "2024-01-31")
+    pd.testing.assert_frame_equal(replayed, expected)
+
+
+def test_cached_pull_skips_source(tmp_path):
+    """A repeated pull over the same window is served from the cache"""
+
+    class CountingSource(ReplaySource):
+        calls = 0
+
+        def bdh(self, *args, **kwargs):
+            CountingSource.calls += 1
+            return super().bdh(*args, **kwargs)
+
+    cache = ResponseCache(tmp_path)
+    source = CountingSource()
+    uncached = pull_treasury_sf_data("2024-01-01", "2024-03-31", source=ReplaySource())
+    first = pull_treasury_sf_data("2024-01-01", "2024-03-31", source=source, cache=cache)
+    second = pull_treasury_sf_data("2024-01-01", "2024-03-31", source=source, cache=cache)
+
+    assert CountingSource.calls == 2
+    for name in uncached:
+        pd.testing.assert_frame_equal(first[name], uncached[name])
+        pd.testing.assert_frame_equal(second[name], uncached[name])
+
+
+def test_arrow_long_format_roundtrip(tmp_path):
+    """Long-format raw files load back into the same wide layout"""
+    source = ReplaySource()
+    pull_treasury_sf_data_arrow("2024-01-01", "2024-03-31", data_dir=tmp_path, source=source)
+    expected = pull_treasury_sf_data("2024-01-01", "2024-03-31", source=source)["sf_rates"]
+
+    loaded = load_sf_rates(data_dir=tmp_path)
+    pd.testing.assert_frame_equal(loaded[expected.columns], expected)
+
+
+def test_chunked_pull_resumes_after_failure(tmp_path):
+    """A failed chunked pull keeps finished checkpoints and resumes from the failed chunk"""
+
+    class FlakySource(ReplaySource):
+        def __init__(self, fail_on):
+            super().__init__()
+            self.fail_on = fail_on
+            self.windows = []
+
+        def bdh(self, tickers, flds, start_date, end_date):
+            if start_date == self.fail_on:
+                self.fail_on = None
+                raise ConnectionError("terminal disconnected")
+            self.windows.append((start_date, end_date))
+            return super().bdh(tickers, flds, start_date, end_date)
+
+    checkpoint_dir = tmp_path / "_checkpoints"
+    source = FlakySource(fail_on="2022-01-01")
+    with pytest.raises(ConnectionError):
+        pull_treasury_sf_data_chunked(
+            "2021-01-01", "2023-12-31", data_dir=tmp_path, checkpoint_dir=checkpoint_dir,
+            source=source,
+        )
+
+    assert sorted(p.name for p in checkpoint_dir.iterdir()) == [
+        "sf_rates_20210101_20211231.parquet",
+        "treasury_yields_20210101_20211231.parquet",
+    ]
+
+    source.windows.clear()
+    pull_treasury_sf_data_chunked(
+        "2021-01-01", "2023-12-31", data_dir=tmp_path, checkpoint_dir=checkpoint_dir,
+        source=source,
+    )
+
+    assert sorted(set(source.windows)) == [
+        ("2022-01-01", "2022-12-31"),
+        ("2023-01-01", "2023-12-31"),
+    ]
+    assert list(checkpoint_dir.iterdir()) == []
+
+    full = pull_treasury_sf_data("2021-01-01", "2023-12-31", source=ReplaySource())
+    pd.testing.assert_frame_equal(load_treasury_yields(data_dir=tmp_path), full["treasury_yields"])
+    pd.testing.assert_frame_equal(load_sf_rates(data_dir=tmp_path), full["sf_rates"])
+
+
+def test_partitioned_load_window(tmp_path):
+    """Year-partitioned raw data loads back whole or restricted to a date window"""
+    df = pull_treasury_sf_data("2021-01-01", "2023-12-31", source=ReplaySource())["sf_rates"]
+    save_raw(df, "sf_rates", data_dir=tmp_path, partitioned=True)
+
+    assert sorted(p.name for p in (tmp_path / "sf_rates").iterdir()) == [
+        "year=2021",
+        "year=2022",
+        "year=2023",
+    ]
+    pd.testing.assert_frame_equal(load_sf_rates(data_dir=tmp_path), df)
+
+    window = load_sf_rates(data_dir=tmp_path, start_date="2022-06-01", end_date="2023-01-31")
+    dates = pd.to_datetime(df[DATE_COL])
+    expected = df[(dates >= "2022-06-01") & (dates <= "2023-01-31")].reset_index(drop=True)
+    pd.testing.assert_frame_equal(window, expected)
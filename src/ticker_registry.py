@@ -0,0 +1,74 @@
+"""
+Registry of the series used by the Treasury-SF basis pipeline.
+
+Each entry pairs a Treasury constant maturity yield ticker with the secured
+financing (SOFR OIS) ticker at the same tenor. The registry is the single
+place that drives which tickers are pulled, how raw Bloomberg columns map to
+tenors, and how the basis output columns are named. To add a tenor, add one
+entry below. Maturities may be fractional (e.g. a "3M" entry with years 0.25).
+"""
+
+import math
+
+# Prefix for basis output column names, e.g. Treasury_SF_10Y
+OUTPUT_PREFIX = "Treasury_SF"
+
+SERIES = [
+    # tenor, maturity in years, Treasury ticker, SF (SOFR OIS) ticker
+    {"tenor": "2Y", "years": 2, "treasury": "USGG2YR Index", "sf": "USOSFR2 Curncy"},
+    {"tenor": "5Y", "years": 5, "treasury": "USGG5YR Index", "sf": "USOSFR5 Curncy"},
+    {"tenor": "10Y", "years": 10, "treasury": "USGG10YR Index", "sf": "USOSFR10 Curncy"},
+    {"tenor": "20Y", "years": 20, "treasury": "USGG20YR Index", "sf": "USOSFR20 Curncy"},
+    {"tenor": "30Y", "years": 30, "treasury": "USGG30YR Index", "sf": "USOSFR30 Curncy"},
+]
+
+
+def tenors():
+    """Tenor labels in registry order."""
+    return [s["tenor"] for s in SERIES]
+
+
+def tenor_years():
+    """Mapping of tenor label to maturity in years."""
+    return {s["tenor"]: s["years"] for s in SERIES}
+
+
+def curve_years():
+    """Whole-year maturities spanning the registered tenors (e.g. 1..30 for 3M..30Y)."""
+    years = tenor_years().values()
+    return list(range(math.ceil(min(years)), math.floor(max(years)) + 1))
+
+
+def maturity_label(years):
+    """Label for a maturity in years, e.g. '7Y', '3M' (under a year) or '2.5Y'."""
+    if float(years).is_integer():
+        return f"{int(years)}Y"
+    months = years * 12
+    if years < 1 and float(months).is_integer():
+        return f"{int(months)}M"
+    return f"{years:g}Y"
+
+
+def treasury_tickers():
+    """Bloomberg tickers for the Treasury yields."""
+    return [s["treasury"] for s in SERIES]
+
+
+def sf_tickers():
+    """Bloomberg tickers for the secured financing rates."""
+    return [s["sf"] for s in SERIES]
+
+
+def treasury_mapping():
+    """Mapping of Treasury ticker root (e.g. 'USGG2YR') to tenor."""
+    return {s["treasury"].split()[0]: s["tenor"] for s in SERIES}
+
+
+def sf_mapping():
+    """Mapping of SF ticker root (e.g. 'USOSFR2') to tenor."""
+    return {s["sf"].split()[0]: s["tenor"] for s in SERIES}
+
+
+def output_columns():
+    """Mapping of tenor to basis output column name."""
+    return {s["tenor"]: f"{OUTPUT_PREFIX}_{s['tenor']}" for s in SERIES}